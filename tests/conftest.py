@@ -37,3 +37,23 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+import pytest
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # Превью строятся в пуле потоков после коммита: дожидаемся их до
+    # того, как фикстуры удалят временный MEDIA_ROOT теста.
+    yield
+    from posts.thumbnails import wait
+    wait()
+
+
+@pytest.fixture()
+def client():
+    # Каждый запрос клиента проверяется на N+1 и бюджет запросов
+    # страницы из posts/urls.py (core/querycount.py).
+    from core.querycount import QueryBudgetClient
+    return QueryBudgetClient()
@@ -1,5 +1,22 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+
+
+def check_templates(app_configs, **kwargs):
+    """Синтаксические ошибки шаблонов проекта видны уже в manage.py check."""
+    from .rendering import warm_templates
+    return [
+        checks.Error(error, id='core.E001') for error in warm_templates()
+    ]
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db.router import check_connections, install_write_tracking
+        request_started.connect(check_connections)
+        connection_created.connect(install_write_tracking)
+        checks.register(check_templates, checks.Tags.templates)
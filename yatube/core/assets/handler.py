@@ -0,0 +1,260 @@
+import mimetypes
+import os
+import stat
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.wsgi import get_path_info
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_compressible
+
+# Файлы с хешем содержимого в имени не меняются: кешируются на год.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Сжатые копии в порядке предпочтения: Accept-Encoding -> расширение.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+class Mount:
+    """Префикс URL, каталог на диске и правило кеширования."""
+
+    def __init__(self, url, root, max_age, immutable=()):
+        url = urlparse(url)
+        self.prefix = url.path
+        self.remote = bool(url.netloc)
+        self.root = root
+        self.max_age = max_age
+        self.immutable = frozenset(immutable)
+
+    def cache_control(self, name):
+        if name in self.immutable:
+            return IMMUTABLE
+        return f'public, max-age={self.max_age}'
+
+
+def default_mounts():
+    """STATIC_URL из STATIC_ROOT и MEDIA_URL из MEDIA_ROOT.
+
+    Хешированные имена берутся из манифеста collectstatic.
+    """
+    hashed = getattr(staticfiles_storage, 'hashed_files', {}).values()
+    return [
+        Mount(settings.STATIC_URL, settings.STATIC_ROOT,
+              settings.STATIC_MAX_AGE, immutable=hashed),
+        Mount(settings.MEDIA_URL, settings.MEDIA_ROOT,
+              settings.MEDIA_MAX_AGE),
+    ]
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме отключённых q=0."""
+    accepted = set()
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """(первый, последний) байт из Range: bytes=...
+
+    None — заголовок не разобран или диапазонов несколько: отдаётся весь
+    файл. RangeNotSatisfiable — диапазон за концом файла (416).
+    """
+    units, _, spec = header.partition('=')
+    if units.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    start, sep, end = spec.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if start:
+            first = int(start)
+            last = int(end) if end else size - 1
+        else:
+            suffix = int(end)
+            if suffix <= 0:
+                raise RangeNotSatisfiable(header)
+            first, last = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    if first < 0 or last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+class FileRange:
+    """Итератор по length байтам открытого файла, с close() для WSGI."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.left = length
+
+    def __iter__(self):
+        while self.left > 0:
+            block = self.file.read(min(BLOCK_SIZE, self.left))
+            if not block:
+                break
+            self.left -= len(block)
+            yield block
+
+    def close(self):
+        self.file.close()
+
+
+class AssetsHandler:
+    """WSGI-обёртка: статика и медиа отдаются до Django.
+
+    URL с доменом (CDN) и префиксы без каталога не монтируются. Файл
+    отправляется через wsgi.file_wrapper (gunicorn отдаёт его
+    sendfile без копирования в Python), view и middleware Django не
+    вызываются. Есть ETag и Last-Modified с ответом 304, Range с 206 и
+    416 и заранее сжатые .br/.gz копии. Остальные запросы идут в
+    application.
+    """
+
+    def __init__(self, application, mounts=None):
+        self.application = application
+        if mounts is None:
+            mounts = default_mounts()
+        self.mounts = [
+            mount for mount in mounts if mount.root and not mount.remote
+        ]
+
+    def __call__(self, environ, start_response):
+        path = get_path_info(environ)
+        for mount in self.mounts:
+            if path.startswith(mount.prefix):
+                return self.serve(
+                    environ, start_response, mount, path[len(mount.prefix):]
+                )
+        return self.application(environ, start_response)
+
+    def serve(self, environ, start_response, mount, name):
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            return respond(start_response, '405 Method Not Allowed',
+                           [('Allow', 'GET, HEAD')])
+        found = find(mount.root, name)
+        if found is None:
+            return respond(start_response, '404 Not Found')
+        path, info = found
+        headers = [
+            ('Content-Type', content_type(name)),
+            ('Cache-Control', mount.cache_control(name)),
+            ('Accept-Ranges', 'bytes'),
+            ('X-Content-Type-Options', 'nosniff'),
+        ]
+        compressible = is_compressible(name)
+        if compressible:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if compressible and not environ.get('HTTP_RANGE'):
+            encoding, variant = compressed_variant(environ, mount, name)
+            if variant is not None:
+                path, info = variant
+                headers.append(('Content-Encoding', encoding))
+        etag = '"{:x}-{:x}"'.format(int(info.st_mtime), info.st_size)
+        headers += [
+            ('ETag', etag),
+            ('Last-Modified', http_date(info.st_mtime)),
+        ]
+        if not_modified(environ, etag, info.st_mtime):
+            return respond(start_response, '304 Not Modified', [
+                header for header in headers
+                if header[0] in ('Cache-Control', 'ETag', 'Vary')
+            ])
+        return self.send(environ, start_response, path, info.st_size,
+                         etag, headers)
+
+    def send(self, environ, start_response, path, size, etag, headers):
+        """Ответ с файлом целиком или его диапазоном из Range."""
+        status, first, length = '200 OK', 0, size
+        range_header = environ.get('HTTP_RANGE')
+        if range_header and environ.get('HTTP_IF_RANGE', etag) == etag:
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return respond(start_response, '416 Range Not Satisfiable',
+                               [('Content-Range', f'bytes */{size}')])
+            if byte_range is not None:
+                first, last = byte_range
+                status, length = '206 Partial Content', last - first + 1
+                headers.append(
+                    ('Content-Range', f'bytes {first}-{last}/{size}')
+                )
+        headers.append(('Content-Length', str(length)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        if length != size:
+            file.seek(first)
+            return FileRange(file, length)
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(file, BLOCK_SIZE)
+        return FileRange(file, length)
+
+
+def compressed_variant(environ, mount, name):
+    """(кодировка, (путь, stat)) сжатой копии, которую примет клиент."""
+    accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted:
+            variant = find(mount.root, name + suffix)
+            if variant is not None:
+                return encoding, variant
+    return None, None
+
+
+def find(root, name):
+    """(путь, stat) обычного файла name внутри root или None."""
+    try:
+        path = safe_join(root, name)
+        info = os.stat(path)
+    except (SuspiciousFileOperation, ValueError, OSError):
+        return None
+    if not stat.S_ISREG(info.st_mode):
+        return None
+    return path, info
+
+
+def content_type(name):
+    guessed, _ = mimetypes.guess_type(name)
+    return guessed or 'application/octet-stream'
+
+
+def not_modified(environ, etag, mtime):
+    if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+    since = parse_http_date_safe(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def respond(start_response, status, headers=()):
+    headers = list(headers)
+    if not status.startswith('304'):
+        headers.append(('Content-Length', '0'))
+    start_response(status, headers)
+    return []
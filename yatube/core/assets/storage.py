@@ -0,0 +1,72 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него только .gz
+    brotli = None
+
+# Какие файлы сжимать заранее; картинки и шрифты уже сжаты.
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml', '.ico',
+)
+# Сжатая копия сохраняется, только если она заметно меньше оригинала.
+MIN_SIZE = 256
+MAX_RATIO = 0.95
+
+
+def _gzip(data):
+    # mtime=0: одинаковые файлы дают одинаковый .gz при каждой сборке.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compressors():
+    """Расширение сжатой копии -> функция сжатия."""
+    found = {'.gz': _gzip}
+    if brotli is not None:
+        found['.br'] = lambda data: brotli.compress(
+            data, mode=brotli.MODE_TEXT
+        )
+    return found
+
+
+def is_compressible(name):
+    return name.lower().endswith(COMPRESSIBLE)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и сжатыми копиями.
+
+    collectstatic после хеширования кладёт рядом с каждым сжимаемым
+    хешированным файлом name.gz (и name.br, если установлен brotli);
+    core.assets.handler отдаёт их клиентам с нужным Accept-Encoding.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if is_compressible(name):
+                for compressed in self.compress(name):
+                    yield name, compressed, True
+
+    def compress(self, name):
+        """Записать сжатые копии name, вернуть их имена."""
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < MIN_SIZE:
+            return []
+        written = []
+        for suffix, compress in compressors().items():
+            packed = compress(data)
+            if len(packed) > len(data) * MAX_RATIO:
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, ContentFile(packed))
+            written.append(target)
+        return written
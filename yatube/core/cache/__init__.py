@@ -0,0 +1,36 @@
+from django.core.cache import cache
+
+NAMESPACE_KEY = 'namespace:{}'
+
+
+def namespace_generation(namespace):
+    """Текущее поколение пространства имён ключей, общее для процессов."""
+    generation = cache.get(NAMESPACE_KEY.format(namespace))
+    if generation is None:
+        cache.add(NAMESPACE_KEY.format(namespace), 1, None)
+        generation = cache.get(NAMESPACE_KEY.format(namespace), 1)
+    return generation
+
+
+def namespaced_key(namespace, key):
+    """Ключ внутри пространства имён: namespace:поколение:key."""
+    return f'{namespace}:{namespace_generation(namespace)}:{key}'
+
+
+def invalidate(key=None, namespace=None):
+    """Сбросить ключ или целое пространство имён во всех процессах.
+
+    Ключ просто удаляется из общего кеша. Для пространства имён
+    поколение увеличивается атомарным incr, и все процессы начинают
+    читать новые ключи; старые доживают до своего таймаута.
+    """
+    if namespace is None:
+        cache.delete(key)
+        return
+    if key is not None:
+        cache.delete(namespaced_key(namespace, key))
+        return
+    try:
+        cache.incr(NAMESPACE_KEY.format(namespace))
+    except ValueError:
+        cache.add(NAMESPACE_KEY.format(namespace), 2, None)
@@ -0,0 +1,42 @@
+import os
+from urllib.parse import urlparse
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'core.cache.redis.RedisCache',
+}
+DEFAULT_LOCATIONS = {
+    'locmem': '',
+    'file': '/var/tmp/yatube_cache',
+    'db': 'yatube_cache',
+    'redis': 'redis://127.0.0.1:6379/0',
+}
+
+
+def cache_settings(environ=os.environ):
+    """Собрать settings.CACHES из переменных окружения.
+
+    YATUBE_CACHE_URL задаёт бэкенд одной строкой: locmem://,
+    file:///путь/к/каталогу, db://имя_таблицы или redis://хост:порт/база.
+    Общий для всех процессов кеш дают file, db и redis; locmem остаётся
+    по умолчанию для разработки и тестов.
+    """
+    url = urlparse(environ.get('YATUBE_CACHE_URL', 'locmem://'))
+    scheme = url.scheme
+    if scheme not in BACKENDS:
+        raise ValueError(f'Неизвестный бэкенд кеша: {scheme!r}')
+    if scheme == 'redis':
+        location = url.geturl()
+    else:
+        location = (url.netloc + url.path) or DEFAULT_LOCATIONS[scheme]
+    return {
+        'default': {
+            'BACKEND': BACKENDS[scheme],
+            'LOCATION': location,
+            'KEY_PREFIX': environ.get('YATUBE_CACHE_PREFIX', 'yatube'),
+            'VERSION': int(environ.get('YATUBE_CACHE_VERSION', 1)),
+            'TIMEOUT': int(environ.get('YATUBE_CACHE_TIMEOUT', 300)),
+        }
+    }
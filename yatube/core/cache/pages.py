@@ -0,0 +1,115 @@
+import hashlib
+import re
+from functools import wraps
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from . import invalidate, namespaced_key
+
+# Кеш целых страниц. Хранится анонимная версия страницы («оболочка»), в
+# которой куски, зависящие от пользователя, помечены тегом {% hole %}.
+# Анонимному посетителю оболочка отдаётся как есть, вошедшему — с
+# заново отрисованными для него кусками.
+NAMESPACE = 'pages'
+HOLE_START = '<!--hole {}-->'
+HOLE_END = '<!--/hole-->'
+HOLE_RE = re.compile(
+    r'<!--hole (?P<template>[^?\s]+)\??(?P<params>\S*)-->'
+    r'(?P<body>.*?)<!--/hole-->',
+    re.DOTALL,
+)
+
+# Параметры адреса, от которых зависит страница. Страница с любыми
+# другими параметрами (?utm_source=..., ?x=случайное) не кешируется:
+# иначе каждый новый параметр занимал бы в кеше свою копию страницы.
+PAGE_PARAMS = ('page', 'cursor')
+
+# Шаблон дырки -> функция (request, **params), которая возвращает
+# контекст для отрисовки под пользователя.
+HOLES = {}
+
+
+def hole(template_name):
+    """Зарегистрировать контекст дырки с шаблоном template_name."""
+    def decorator(func):
+        HOLES[template_name] = func
+        return func
+    return decorator
+
+
+def hole_markers(template_name, params):
+    """Начало и конец дырки в оболочке страницы."""
+    if params:
+        template_name = f'{template_name}?{urlencode(params)}'
+    return HOLE_START.format(template_name), HOLE_END
+
+
+def fill_holes(content, request):
+    """Отрисовать все дырки оболочки для request.user."""
+    def render(match):
+        template_name = match['template']
+        params = dict(parse_qsl(match['params']))
+        provider = HOLES.get(template_name)
+        context = provider(request, **params) if provider else {}
+        return render_to_string(template_name, context, request)
+    return HOLE_RE.sub(render, content)
+
+
+def strip_holes(content):
+    """Анонимная страница: содержимое дырок без пометок."""
+    return HOLE_RE.sub(lambda match: match['body'], content)
+
+
+def page_key(request):
+    """Ключ оболочки по пути и параметрам из PAGE_PARAMS.
+
+    None — у адреса есть другие параметры или параметр повторяется,
+    такую страницу не кешируют.
+    """
+    params = request.GET
+    if any(name not in PAGE_PARAMS or len(params.getlist(name)) > 1
+           for name in params):
+        return None
+    query = urlencode(sorted(params.items()))
+    path = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return namespaced_key(NAMESPACE, path)
+
+
+def invalidate_pages():
+    """Сбросить все закешированные страницы во всех процессах."""
+    invalidate(namespace=NAMESPACE)
+
+
+def cache_page_shell(view):
+    """Кешировать страницу view по адресу с параметрами.
+
+    Оболочку сохраняет только анонимный запрос: вошедшему при промахе
+    страница рисуется обычным образом. Адреса с параметрами не из
+    PAGE_PARAMS не кешируются. Сбрасывается кеш сигналами постов и групп
+    (invalidate_pages).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = page_key(request)
+        if request.method not in ('GET', 'HEAD') or key is None:
+            return view(request, *args, **kwargs)
+        shell = cache.get(key)
+        if shell is not None:
+            if request.user.is_authenticated:
+                return HttpResponse(fill_holes(shell, request))
+            return HttpResponse(strip_holes(shell))
+        if request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        request.page_shell = True
+        response = view(request, *args, **kwargs)
+        if response.status_code != 200 or response.streaming:
+            return response
+        shell = response.content.decode(response.charset)
+        cache.set(key, shell, settings.PAGE_CACHE_TIMEOUT)
+        response.content = strip_holes(shell)
+        return response
+    return wrapper
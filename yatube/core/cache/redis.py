@@ -0,0 +1,205 @@
+import pickle
+import socket
+import threading
+from urllib.parse import urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class RedisError(Exception):
+    pass
+
+
+class Connection:
+    """Минимальный клиент протокола RESP2 поверх одного сокета."""
+
+    def __init__(self, host, port, db=0, password=None, timeout=5):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.file = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def execute(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.sock.sendall(b''.join(parts))
+        return self.read()
+
+    def read(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError('Соединение с кешем закрыто')
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body
+        if kind == b'-':
+            raise RedisError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length == -1:
+                return None
+            data = self.file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(body)
+            if length == -1:
+                return None
+            return [self.read() for _ in range(length)]
+        raise RedisError(f'Неожиданный ответ: {line!r}')
+
+
+class RedisCache(BaseCache):
+    """Кеш-бэкенд для серверов с протоколом Redis без внешних зависимостей.
+
+    Целые числа хранятся как есть, чтобы incr() был атомарным INCRBY,
+    остальные значения сериализуются pickle. Соединение своё у каждого
+    потока и переживает запросы.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        url = urlparse(server)
+        self._host = url.hostname or '127.0.0.1'
+        self._port = url.port or 6379
+        self._db = int(url.path.lstrip('/') or 0)
+        self._password = url.password
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = Connection(
+                self._host, self._port, self._db, self._password
+            )
+            self._local.connection = connection
+        return connection
+
+    def _execute(self, *args):
+        try:
+            return self._connection().execute(*args)
+        except (ConnectionError, OSError):
+            # Сервер мог закрыть простаивающее соединение: одна попытка
+            # переподключиться, дальше ошибка уходит наверх.
+            self._drop_connection()
+            return self._connection().execute(*args)
+
+    def _drop_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def _encode(self, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, raw):
+        try:
+            return int(raw)
+        except ValueError:
+            return pickle.loads(raw)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl(self, timeout):
+        """Относительный срок жизни в миллисекундах или None."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 1)
+
+    def _set_args(self, key, value, timeout):
+        args = ['SET', key, self._encode(value)]
+        ttl = self._ttl(timeout)
+        if ttl is not None:
+            args += ['PX', ttl]
+        return args
+
+    @staticmethod
+    def _expired(timeout):
+        return timeout is not DEFAULT_TIMEOUT and (
+            timeout is not None and timeout <= 0
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if self._expired(timeout):
+            return False
+        return self._execute(*self._set_args(key, value, timeout),
+                             'NX') is not None
+
+    def get(self, key, default=None, version=None):
+        raw = self._execute('GET', self._key(key, version))
+        if raw is None:
+            return default
+        return self._decode(raw)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        if self._expired(timeout):
+            self._execute('DEL', key)
+            return
+        self._execute(*self._set_args(key, value, timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl(timeout)
+        if ttl is None:
+            self._execute('PERSIST', key)
+            return bool(self._execute('EXISTS', key))
+        return bool(self._execute('PEXPIRE', key, ttl))
+
+    def delete(self, key, version=None):
+        self._execute('DEL', self._key(key, version))
+
+    def has_key(self, key, version=None):
+        return bool(self._execute('EXISTS', self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self._execute('EXISTS', key):
+            raise ValueError("Key '%s' not found" % key)
+        return self._execute('INCRBY', key, delta)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._execute(
+            'MGET', *(self._key(key, version) for key in keys)
+        )
+        return {
+            key: self._decode(raw)
+            for key, raw in zip(keys, values) if raw is not None
+        }
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._execute('DEL', *keys)
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Соединения потоков переиспользуются между запросами.
+        pass
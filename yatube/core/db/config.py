@@ -0,0 +1,36 @@
+import os
+
+REPLICA_PREFIX = 'replica_'
+
+
+def database_settings(base_dir, environ=os.environ, tuned=False):
+    """Собрать settings.DATABASES из переменных окружения.
+
+    YATUBE_DB_ENGINE — бэкенд базы; по умолчанию стандартный SQLite,
+    а с tuned — SQLite с настройками для продакшена (core.db.sqlite3).
+    YATUBE_DB_CONN_MAX_AGE — сколько секунд держать соединение открытым
+    между запросами (0 — закрывать после каждого запроса).
+    YATUBE_DB_REPLICAS — реплики для чтения через запятую; для SQLite
+    это пути к файлам-копиям основной базы. В тестах реплики смотрят в
+    тестовую основную базу (MIRROR).
+    """
+    engine = 'core.db.sqlite3' if tuned else 'django.db.backends.sqlite3'
+    primary = {
+        'ENGINE': environ.get('YATUBE_DB_ENGINE', engine),
+        'NAME': os.path.join(base_dir, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(environ.get('YATUBE_DB_CONN_MAX_AGE', 60)),
+    }
+    databases = {'default': primary}
+    names = [
+        name.strip() for name in environ.get('YATUBE_DB_REPLICAS', '')
+        .split(',') if name.strip()
+    ]
+    for number, name in enumerate(names, start=1):
+        databases[f'{REPLICA_PREFIX}{number}'] = {
+            **primary, 'NAME': name, 'TEST': {'MIRROR': 'default'},
+        }
+    return databases
+
+
+def replica_aliases(databases):
+    return [alias for alias in databases if alias.startswith(REPLICA_PREFIX)]
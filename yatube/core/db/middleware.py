@@ -0,0 +1,76 @@
+from django.conf import settings
+
+from .router import has_written, allow_replica_reads, start_request
+from .sqlite3.base import defer_transactions
+
+PRIMARY_COOKIE = 'yatube_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaMiddleware:
+    """Чтение с реплик в помеченных view и «читай свои записи».
+
+    Если клиент что-то записал, он получает куку на
+    REPLICA_STICKY_SECONDS секунд, и всё это время его чтения идут с
+    основной базы, пока реплики догоняют её. Состояние запроса
+    сбрасывается при закрытии ответа: потоковый ответ читает базу уже
+    после выхода из view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start_request()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            start_request()
+            raise
+        if has_written():
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+                httponly=True,
+            )
+        close = response.close
+
+        def close_and_reset():
+            try:
+                close()
+            finally:
+                start_request()
+
+        response.close = close_and_reset
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (getattr(view_func, 'replica_reads', False)
+                and PRIMARY_COOKIE not in request.COOKIES):
+            allow_replica_reads()
+
+
+class DeferredTransactionsMiddleware:
+    """Транзакции читающих view (read_from_replica) в безопасных запросах
+    не встают в очередь записи, пока ничего не пишут
+    (core.db.sqlite3.defer_transactions).
+
+    Остальные view, в том числе пишущие на GET вроде подписки, начинают
+    транзакции с BEGIN IMMEDIATE: запись после чтения в отложенной
+    транзакции SQLite может сразу отклонить.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            defer_transactions(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        defer_transactions(
+            request.method in SAFE_METHODS
+            and getattr(view_func, 'replica_reads', False)
+        )
@@ -0,0 +1,129 @@
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Состояние текущего запроса: можно ли читать с реплик и была ли уже
+# запись (после неё чтение до конца запроса идёт с основной базы).
+_local = threading.local()
+# Таблица, в которую пишет запрос.
+WRITE_RE = re.compile(
+    r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|REPLACE\s+INTO)\s+"?(\w+)',
+    re.IGNORECASE,
+)
+
+
+def start_request(replica_reads=False):
+    _local.replica_reads = replica_reads
+    _local.written = False
+
+
+def allow_replica_reads():
+    _local.replica_reads = True
+
+
+def has_written():
+    return getattr(_local, 'written', False)
+
+
+def replica_apps():
+    return getattr(settings, 'REPLICA_APPS', ('posts', 'auth'))
+
+
+@lru_cache(maxsize=None)
+def replicated_tables(app_labels):
+    """Таблицы моделей приложений app_labels, вместе с таблицами M2M."""
+    return frozenset(
+        model._meta.db_table
+        for label in app_labels
+        for model in apps.get_app_config(label).get_models(
+            include_auto_created=True
+        )
+    )
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper основной базы: отмечает запись в таблицы моделей
+    из REPLICA_APPS.
+
+    Сессии, кеш в базе и get_or_create, нашедший строку, клиента к
+    основной базе не привязывают.
+    """
+    if not has_written():
+        match = WRITE_RE.match(sql)
+        if match and match[1] in replicated_tables(replica_apps()):
+            _local.written = True
+    return execute(sql, params, many, context)
+
+
+def install_write_tracking(sender, connection, **kwargs):
+    """Обработчик connection_created: повесить track_writes на основную
+    базу."""
+    if (connection.alias == DEFAULT_DB_ALIAS
+            and track_writes not in connection.execute_wrappers):
+        connection.execute_wrappers.insert(0, track_writes)
+
+
+def read_from_replica(view):
+    """Пометить view как читающую: её запросы могут идти на реплику.
+
+    Пометку проверяет core.db.middleware.ReplicaMiddleware.
+    """
+    view.replica_reads = True
+    return view
+
+
+class ReplicaRouter:
+    """Чтение моделей REPLICA_APPS в помеченных view — со случайной
+    реплики, остальное — с основной базы.
+
+    Сессии и кеш в базе всегда на основной. На неё же идут чтения внутри
+    транзакции и чтения после записи в том же запросе или недавней
+    записи того же клиента (см. track_writes и ReplicaMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if (not replicas or has_written()
+                or not getattr(_local, 'replica_reads', False)
+                or model._meta.app_label not in replica_apps()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def check_connections(**kwargs):
+    """Проверить постоянные соединения перед запросом.
+
+    Соединение, которое не проверялось дольше DB_HEALTH_CHECK_INTERVAL
+    секунд, проверяется is_usable() и закрывается, если база его
+    оборвала: следующий запрос к базе откроет новое.
+    """
+    interval = getattr(settings, 'DB_HEALTH_CHECK_INTERVAL', 30)
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        checked = getattr(connection, 'health_checked_at', None)
+        if checked is not None and now - checked < interval:
+            continue
+        if connection.is_usable():
+            connection.health_checked_at = now
+        else:
+            connection.close()
+            connection.health_checked_at = None
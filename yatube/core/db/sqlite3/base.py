@@ -0,0 +1,177 @@
+import threading
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+# PRAGMA каждого нового соединения; OPTIONS['pragmas'] в настройках базы
+# дополняет и переопределяет их. busy_timeout идёт первым: смена режима
+# журнала ждёт блокировку.
+PRAGMAS = {
+    'busy_timeout': 5000,  # мс ожидания записи другого процесса
+    'journal_mode': 'wal',  # читатели не ждут писателя и наоборот
+    'synchronous': 'normal',  # в WAL база не портится и при сбое
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # в КиБ: 64 МиБ на соединение
+}
+# Запросы, которые берут блокировку записи.
+WRITE_STATEMENTS = (
+    'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER',
+)
+
+# Транзакции текущего потока начинаются без блокировки записи (см.
+# defer_transactions).
+_local = threading.local()
+
+
+def defer_transactions(deferred=True):
+    """Начинать транзакции потока с обычного BEGIN.
+
+    Такая транзакция встаёт в очередь записи только на первом изменении.
+    Подходит для GET-запросов, где транзакции почти всегда только читают.
+    """
+    _local.deferred = deferred
+
+
+class WriteQueue:
+    """Очередь пишущих транзакций процесса: по одной, в порядке прихода.
+
+    SQLite всё равно пропускает одного писателя; очередь не даёт
+    потокам толкаться за блокировку и получать «database is locked».
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.next_ticket = 0
+        self.serving = 0
+        # Билеты тех, кто не дождался очереди: их номер пропускается.
+        self.abandoned = set()
+
+    def acquire(self, timeout=None):
+        with self.condition:
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            if not self.condition.wait_for(
+                    lambda: self.serving == ticket, timeout):
+                self.abandoned.add(ticket)
+                raise OperationalError('database is locked')
+
+    def release(self):
+        with self.condition:
+            self.serving += 1
+            while self.serving in self.abandoned:
+                self.abandoned.remove(self.serving)
+                self.serving += 1
+            self.condition.notify_all()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def write_queue(name):
+    """Общая для всех соединений процесса очередь базы name."""
+    with _queues_lock:
+        return _queues.setdefault(name, WriteQueue())
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    """Курсор, который ставит отложенную транзакцию в очередь записи."""
+
+    database = None
+
+    def execute(self, query, params=None):
+        self.database.before_statement(query)
+        return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        self.database.before_statement(query)
+        return super().executemany(query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite для продакшена: WAL, PRAGMA и очередь записи.
+
+    Транзакции (transaction.atomic) начинаются с BEGIN IMMEDIATE и
+    встают в очередь записи процесса; другие процессы ждут блокировку
+    busy_timeout. Отложенные транзакции (defer_transactions) встают в
+    очередь на первом изменении, только читающие — не встают вовсе.
+    Очередь ждут не дольше OPTIONS['timeout'] или busy_timeout, потом
+    OperationalError('database is locked'). Чтение вне транзакций
+    очередь не ждёт.
+    """
+
+    holds_write_queue = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        self.queue_timeout = params.get(
+            'timeout', self.pragmas['busy_timeout'] / 1000
+        )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.database = self
+        return cursor
+
+    @property
+    def write_queue(self):
+        return write_queue(self.settings_dict['NAME'])
+
+    def acquire_write_queue(self):
+        self.write_queue.acquire(self.queue_timeout)
+        self.holds_write_queue = True
+
+    def before_statement(self, query):
+        # Первое изменение в отложенной транзакции. Если она уже читала,
+        # а другой писатель успел записать, SQLite ответит «database is
+        # locked» сразу — поэтому отложенными делают только транзакции,
+        # которые почти никогда не пишут.
+        if (self.in_atomic_block and not self.holds_write_queue
+                and query.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)):
+            self.acquire_write_queue()
+
+    def _start_transaction_under_autocommit(self):
+        if getattr(_local, 'deferred', False):
+            self.cursor().execute('BEGIN')
+            return
+        # Обычный BEGIN берёт блокировку записи только на первом
+        # изменении, и если другой писатель успел раньше, SQLite сразу
+        # отвечает «database is locked», не дожидаясь busy_timeout.
+        self.acquire_write_queue()
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self.release_write_queue()
+            raise
+
+    def release_write_queue(self):
+        if self.holds_write_queue:
+            self.holds_write_queue = False
+            self.write_queue.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_queue()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_queue()
+
+    def _close(self):
+        # Закрытое посреди транзакции соединение SQLite откатывает само.
+        try:
+            return super()._close()
+        finally:
+            self.release_write_queue()
@@ -0,0 +1,39 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Строки плана, которые считаются проблемой: полный проход по таблице
+# без индекса и сортировка во временном B-дереве (SQLite) или отдельным
+# узлом Sort (PostgreSQL).
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?\S+(?: AS \S+)?$')
+SQLITE_TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on')
+POSTGRES_SORT = re.compile(r'^\s*(?:->\s*)?Sort\b')
+
+
+def explain(sql, using=DEFAULT_DB_ALIAS):
+    """План запроса sql построчно.
+
+    sql — готовый текст запроса с подставленными параметрами, как в
+    connection.queries.
+    """
+    connection = connections[using]
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        rows = cursor.fetchall()
+    return [str(row[-1]) for row in rows]
+
+
+def problems(plan, using=DEFAULT_DB_ALIAS):
+    """Строки плана с полным проходом по таблице или сортировкой."""
+    if connections[using].vendor == 'sqlite':
+        patterns = (SQLITE_FULL_SCAN, SQLITE_TEMP_SORT)
+    else:
+        patterns = (POSTGRES_FULL_SCAN, POSTGRES_SORT)
+    return [
+        line for line in plan
+        if any(pattern.search(line.strip()) for pattern in patterns)
+    ]
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.rendering import profile_rendering
+
+
+class Command(BaseCommand):
+    help = ('Открывает страницы тестовым клиентом и печатает суммарное '
+            'время отрисовки шаблонов, include и тегов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/'],
+                            help='Адреса страниц, по умолчанию /')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Запросов к каждой странице')
+        parser.add_argument('--user', help='Открывать страницы от его имени')
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options['user']:
+            user = get_user_model().objects.filter(
+                username=options['user']
+            ).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {options["user"]}')
+            client.force_login(user)
+        # Без кеша: каждая страница отрисовывается целиком.
+        with override_settings(
+            DEBUG=False, ALLOWED_HOSTS=['testserver'],
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+            }},
+        ), profile_rendering() as profile:
+            for path in options['paths']:
+                for _ in range(options['requests']):
+                    response = client.get(path)
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f'{path}: ответ {response.status_code}'
+                        )
+        self.stdout.write(profile.report())
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+# Лёгкие метрики запросов для продакшена. Подробные замеры (SQL,
+# шаблоны, кеш) снимаются только с выборки запросов, см.
+# METRICS_SAMPLE_RATE; счётчик запросов и время ответа — со всех.
+QUANTILES = (0.5, 0.95, 0.99)
+COUNTERS = (
+    'sampled', 'db_queries', 'db_seconds', 'template_seconds',
+    'cache_hits', 'cache_misses',
+)
+
+_local = threading.local()
+_lock = threading.Lock()
+_installed = False
+_missing = object()
+
+
+class Recorder:
+    """Замеры одного запроса из выборки."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper соединений с базой.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.db_queries += 1
+
+    def record(self):
+        """Включить замеры в текущем потоке на время блока with."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        stack.callback(setattr, _local, 'recorder', None)
+        _local.recorder = self
+        return stack
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={self.db_seconds * 1000:.1f};'
+            f'desc="{self.db_queries} queries"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ))
+
+
+def current():
+    return getattr(_local, 'recorder', None)
+
+
+class Registry:
+    """Накопленные метрики процесса.
+
+    Счётчики только растут, как того ждёт Prometheus. Квантили времени
+    ответа считаются по кольцевому буферу последних запросов каждого
+    представления.
+    """
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self.requests = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.counters = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self.durations = defaultdict(
+            lambda: deque(maxlen=self.buffer_size)
+        )
+
+    def add(self, view, seconds, recorder=None):
+        with _lock:
+            self.requests[view] += 1
+            self.seconds[view] += seconds
+            self.durations[view].append(seconds)
+            if recorder is None:
+                return
+            counters = self.counters[view]
+            counters['sampled'] += 1
+            for name in COUNTERS[1:]:
+                counters[name] += getattr(recorder, name)
+
+    def snapshot(self):
+        with _lock:
+            return (
+                dict(self.requests), dict(self.seconds),
+                {view: dict(values) for view, values in self.counters.items()},
+                {view: sorted(values)
+                 for view, values in self.durations.items()},
+            )
+
+    def render(self):
+        """Текст в формате Prometheus exposition 0.0.4."""
+        requests, seconds, counters, durations = self.snapshot()
+        lines = [
+            '# HELP yatube_request_duration_seconds Время ответа.',
+            '# TYPE yatube_request_duration_seconds summary',
+        ]
+        for view in sorted(requests):
+            values = durations[view]
+            for quantile in QUANTILES:
+                index = min(int(quantile * len(values)), len(values) - 1)
+                lines.append(
+                    f'yatube_request_duration_seconds{{view="{view}",'
+                    f'quantile="{quantile}"}} {values[index]:.6f}'
+                )
+            lines.append(
+                f'yatube_request_duration_seconds_sum{{view="{view}"}} '
+                f'{seconds[view]:.6f}'
+            )
+            lines.append(
+                f'yatube_request_duration_seconds_count{{view="{view}"}} '
+                f'{requests[view]}'
+            )
+        for name in COUNTERS:
+            lines.append(f'# TYPE yatube_{name}_total counter')
+            for view in sorted(counters):
+                value = counters[view][name]
+                if isinstance(value, float):
+                    value = f'{value:.6f}'
+                lines.append(
+                    f'yatube_{name}_total{{view="{view}"}} {value}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(getattr(settings, 'METRICS_BUFFER_SIZE', 1000))
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        recorder = current()
+        if recorder is None:
+            return render(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            recorder.template_seconds += time.perf_counter() - start
+    return wrapper
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        recorder = current()
+        if recorder is None:
+            return get(self, key, default, version)
+        value = get(self, key, _missing, version)
+        if value is _missing:
+            recorder.cache_misses += 1
+            return default
+        recorder.cache_hits += 1
+        return value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        recorder = current()
+        keys = list(keys)
+        values = get_many(self, keys, version)
+        if recorder is not None:
+            recorder.cache_hits += len(values)
+            recorder.cache_misses += len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def install():
+    """Подключить замер шаблонов и кеша; повторные вызовы ничего не делают.
+
+    Время шаблонов меряется у бэкендов шаблонов Django и Jinja2: их
+    render вызывается один раз на страницу, вложенные include в замер
+    уже входят. Попадания считаются у классов бэкендов кеша из CACHES.
+    """
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        _installed = True
+    from django.template.backends.django import Template
+    Template.render = _timed_render(Template.render)
+    try:
+        from django.template.backends.jinja2 import Template
+    except ImportError:
+        pass
+    else:
+        Template.render = _timed_render(Template.render)
+    for backend in {params['BACKEND'] for params in settings.CACHES.values()}:
+        cls = import_string(backend)
+        cls.get = _counted_get(cls.get)
+        cls.get_many = _counted_get_many(cls.get_many)
@@ -0,0 +1,37 @@
+import random
+import time
+
+from django.conf import settings
+
+from . import Recorder, install, registry
+
+
+class MetricsMiddleware:
+    """Время ответа каждого запроса и подробные замеры выборки запросов.
+
+    Доля подробно замеряемых запросов задаётся METRICS_SAMPLE_RATE:
+    только им достаются обёртки SQL, шаблонов и кеша и заголовок
+    Server-Timing. Остальные запросы стоят два вызова perf_counter().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'METRICS_SAMPLE_RATE', 0.01)
+        install()
+
+    def __call__(self, request):
+        recorder = None
+        start = time.perf_counter()
+        if random.random() < self.sample_rate:
+            recorder = Recorder()
+            with recorder.record():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry.add(view, seconds, recorder)
+        if recorder is not None:
+            response['Server-Timing'] = recorder.server_timing(seconds)
+        return response
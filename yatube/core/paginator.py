@@ -0,0 +1,164 @@
+import base64
+import json
+from types import SimpleNamespace
+
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+NEXT = 'n'  # курсор ведёт к более старым записям
+PREVIOUS = 'p'  # курсор ведёт к более новым записям
+
+
+class CursorPaginator(Paginator):
+    """Паджинатор по ключу (по умолчанию (created, id)).
+
+    Вместо COUNT(*) и OFFSET выбирает per_page + 1 строк после курсора,
+    поэтому стоимость страницы не зависит от её глубины. Один экземпляр
+    обслуживает одно окно выдачи: после get_page() в нём лежат
+    next_cursor и previous_cursor для шаблона.
+    """
+
+    def __init__(self, object_list, per_page, total=None,
+                 ordering=('-created', '-id')):
+        self.ordering = tuple(ordering)
+        self.total = total
+        self.next_cursor = None
+        self.previous_cursor = None
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+
+    @cached_property
+    def count(self):
+        """Приблизительное количество объектов или None, если неизвестно."""
+        if callable(self.total):
+            return self.total()
+        return self.total
+
+    @cached_property
+    def num_pages(self):
+        return 1
+
+    def get_page(self, cursor):
+        """Вернуть страницу; битый курсор ведёт на первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidPage:
+            return self.page(None)
+
+    def page(self, cursor):
+        """Вернуть страницу, следующую за курсором."""
+        direction, values = self.decode_cursor(cursor)
+        rows = self.fetch(direction, values)
+        if values is None or direction == NEXT:
+            has_previous = values is not None
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+        else:
+            has_previous, has_next = len(rows) > self.per_page, True
+            rows = rows[:self.per_page][::-1]
+        if rows and has_next:
+            self.next_cursor = self.encode_cursor(NEXT, rows[-1])
+        if rows and has_previous:
+            self.previous_cursor = self.encode_cursor(PREVIOUS, rows[0])
+        # Номер страницы условный: 1 для самой свежей, 2 для остальных.
+        # Его хватает, чтобы has_next()/has_previous() у Page работали.
+        number = 2 if self.previous_cursor else 1
+        self.num_pages = number + 1 if self.next_cursor else number
+        return self._get_page(rows, number, self)
+
+    def fetch(self, direction, values):
+        """До per_page + 1 строк после курсора.
+
+        Для PREVIOUS строки идут в обратном порядке, от курсора к более
+        новым.
+        """
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(
+                self._seek(values, backwards=direction == PREVIOUS)
+            )
+            if direction == PREVIOUS:
+                queryset = queryset.reverse()
+        return list(queryset[:self.per_page + 1])
+
+    def _fields(self, ordering=None):
+        return [name.lstrip('-') for name in ordering or self.ordering]
+
+    def _seek(self, values, backwards=False, ordering=None):
+        """Условие «строго после курсора» в порядке ordering.
+
+        По умолчанию берётся self.ordering; другой порядок нужен, когда
+        ключ курсора лежит в полях другой модели с теми же значениями.
+        """
+        ordering = ordering or self.ordering
+        fields = self._fields(ordering)
+        condition = Q()
+        for i, name in enumerate(ordering):
+            descending = name.startswith('-') != backwards
+            lookup = '__lt' if descending else '__gt'
+            field = name.lstrip('-')
+            equal = {prev: values[j] for j, prev in enumerate(fields[:i])}
+            condition |= Q(**equal, **{field + lookup: values[i]})
+        return condition
+
+    def encode_cursor(self, direction, obj):
+        """Непрозрачный токен курсора для URL.
+
+        obj — объект модели или словарь строки из .values().
+        """
+        if isinstance(obj, dict):
+            obj = SimpleNamespace(**obj)
+        values = [
+            self.object_list.model._meta.get_field(field)
+            .value_to_string(obj)
+            for field in self._fields()
+        ]
+        raw = json.dumps([direction] + values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, *values = json.loads(raw.decode())
+        except Exception:
+            raise InvalidPage('Некорректный курсор')
+        # encode_cursor пишет значения строками: null, числа и списки
+        # в курсоре — подделка, и Q(created__lt=None) упал бы в запросе.
+        if direction not in (NEXT, PREVIOUS) or (
+            len(values) != len(self.ordering)
+        ) or not all(isinstance(value, str) for value in values):
+            raise InvalidPage('Некорректный курсор')
+        meta = self.object_list.model._meta
+        try:
+            values = [
+                meta.get_field(field).to_python(value)
+                for field, value in zip(self._fields(), values)
+            ]
+        except Exception:
+            raise InvalidPage('Некорректный курсор')
+        if None in values:
+            raise InvalidPage('Некорректный курсор')
+        return direction, values
+
+
+def approximate_count(model, using='default'):
+    """Дешёвая оценка размера таблицы без COUNT(*).
+
+    PostgreSQL хранит оценку в pg_class, для остальных баз берётся
+    максимальный первичный ключ — это поиск по индексу, а не скан.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+    return model.objects.using(using).aggregate(
+        total=Max('pk')
+    )['total'] or 0
@@ -0,0 +1,95 @@
+import re
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, get_resolver, resolve
+
+# Проверка запросов страниц в тестах: повторяющиеся запросы (N+1) и
+# превышение бюджета. Бюджеты объявляются в модуле urls приложения:
+# QUERY_BUDGETS — имя URL -> наибольшее число запросов за вызов,
+# QUERY_REPEAT_LIMIT — сколько раз может повториться один запрос.
+REPEAT_LIMIT = 2
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_RE = re.compile(r'\bIN \((?:\?, )*\?\)')
+SPACE_RE = re.compile(r'\s+')
+IGNORED = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT')
+
+
+def normalize(sql):
+    """Текст запроса без значений: одинаковые запросы совпадают."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def statements(queries):
+    """Нормализованные запросы без служебных команд транзакций."""
+    return [
+        normalize(query['sql']) for query in queries
+        if not query['sql'].lstrip().upper().startswith(IGNORED)
+    ]
+
+
+def problems(queries, budget=None, repeat_limit=REPEAT_LIMIT):
+    """Список нарушений для запросов одного вызова страницы."""
+    sqls = statements(queries)
+    found = [
+        f'запрос выполнен {count} раз (можно {repeat_limit}): {sql}'
+        for sql, count in Counter(sqls).most_common()
+        if count > repeat_limit
+    ]
+    if budget is not None and len(sqls) > budget:
+        found.append(f'{len(sqls)} запросов при бюджете {budget}')
+    return found
+
+
+def limits_for(match):
+    """Бюджет и лимит повторов для найденного URL из его модуля urls."""
+    resolver = get_resolver()
+    for namespace in match.namespaces:
+        resolver = resolver.namespace_dict[namespace][1]
+    module = resolver.urlconf_module
+    budgets = getattr(module, 'QUERY_BUDGETS', {})
+    return (
+        budgets.get(match.url_name),
+        getattr(module, 'QUERY_REPEAT_LIMIT', REPEAT_LIMIT),
+    )
+
+
+class QueryBudgetClient(Client):
+    """Тестовый клиент, проверяющий запросы каждой страницы.
+
+    Если страница повторяет запрос больше лимита или выходит за бюджет
+    из urls, запрос падает с AssertionError и списком запросов. Потоковый
+    ответ читается целиком внутри проверки: запросы, которые он делает
+    при отдаче, тоже входят в бюджет.
+    """
+
+    def request(self, **request):
+        connection = connections[DEFAULT_DB_ALIAS]
+        with CaptureQueriesContext(connection) as queries:
+            response = super().request(**request)
+            if response.streaming:
+                response.streaming_content = list(response.streaming_content)
+        try:
+            match = resolve(request['PATH_INFO'])
+        except Resolver404:
+            return response
+        budget, repeat_limit = limits_for(match)
+        found = problems(queries.captured_queries, budget, repeat_limit)
+        if found:
+            raise AssertionError(
+                f'{match.view_name} ({request["PATH_INFO"]}):\n'
+                + '\n'.join(found)
+            )
+        return response
+
+
+class QueryBudgetMixin:
+    """Примесь к TestCase: self.client проверяет запросы страниц."""
+    client_class = QueryBudgetClient
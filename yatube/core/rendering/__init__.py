@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+
+# Профилировщик отрисовки: суммарное время каждого шаблона и узлов
+# PROFILED_NODES (include и теги вроде post_thumbnail и thumbnail).
+# Время вложенных шаблонов входит во время внешних.
+PROFILED_NODES = ('IncludeNode', 'SimpleNode', 'ThumbnailNode', 'CacheNode')
+QUOTES = '\'"'
+
+_local = threading.local()
+_lock = threading.Lock()
+_installed = False
+
+
+def engine_for(request):
+    """Движок шаблонов view запроса из VIEW_TEMPLATE_ENGINES.
+
+    None — движок по умолчанию, первый в TEMPLATES, где нашёлся шаблон.
+    """
+    match = request.resolver_match
+    if match is None:
+        return None
+    return getattr(settings, 'VIEW_TEMPLATE_ENGINES', {}).get(match.view_name)
+
+
+def warm_templates():
+    """Скомпилировать все шаблоны из DIRS бэкендов шаблонов.
+
+    С кеширующим загрузчиком Django и в окружении Jinja2 шаблоны
+    оказываются в кеше до первого запроса. Возвращает список ошибок
+    «шаблон: ошибка».
+    """
+    errors = []
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for root, dirs, files in os.walk(directory):
+                for file in sorted(files):
+                    name = os.path.relpath(
+                        os.path.join(root, file), directory
+                    ).replace(os.sep, '/')
+                    try:
+                        engine.get_template(name)
+                    except TemplateSyntaxError as error:
+                        errors.append(f'{name}: {error}')
+    return errors
+
+
+class RenderProfile:
+    """Накопленное время отрисовки: (вид, имя) -> [вызовы, секунды]."""
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: [0, 0.0])
+
+    def add(self, kind, name, seconds):
+        stat = self.stats[kind, name]
+        stat[0] += 1
+        stat[1] += seconds
+
+    def rows(self):
+        """(вид, имя, вызовы, всего мс, среднее мс) по убыванию времени."""
+        return [
+            (kind, name, calls, seconds * 1000, seconds * 1000 / calls)
+            for (kind, name), (calls, seconds) in sorted(
+                self.stats.items(), key=lambda item: -item[1][1]
+            )
+        ]
+
+    def report(self):
+        lines = [f'{"вид":<9}{"имя":<48}{"вызовы":>8}{"всего мс":>11}'
+                 f'{"ср. мс":>9}']
+        for kind, name, calls, total, mean in self.rows():
+            lines.append(
+                f'{kind:<9}{name:<48}{calls:>8}{total:>11.2f}{mean:>9.3f}'
+            )
+        return '\n'.join(lines)
+
+
+def node_name(node):
+    """Вид и имя узла для отчёта или None, если узел не замеряется."""
+    kind = type(node).__name__
+    if kind not in PROFILED_NODES:
+        return None
+    if kind == 'IncludeNode':
+        return 'include', node.template.token.strip(QUOTES)
+    if kind == 'SimpleNode':
+        # Строковый первый аргумент, как шаблон в {% hole %}, — часть имени.
+        name = node.func.__name__
+        if node.args and node.args[0].token[:1] in QUOTES:
+            name = f'{name} {node.args[0].token.strip(QUOTES)}'
+        return 'tag', name
+    if kind == 'CacheNode':
+        return 'tag', f'cache {node.fragment_name}'
+    return 'tag', 'thumbnail'
+
+
+def _current():
+    return getattr(_local, 'profile', None)
+
+
+def _timed(render, name):
+    def wrapper(self, context, *args, **kwargs):
+        profile = _current()
+        key = profile is not None and name(self)
+        if not key:
+            return render(self, context, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return render(self, context, *args, **kwargs)
+        finally:
+            profile.add(*key, time.perf_counter() - start)
+    return wrapper
+
+
+def install():
+    """Подключить замеры к классам шаблонов и узлов; один раз на процесс.
+
+    Пока профилировщик не включён в потоке, обёртки только проверяют
+    это и вызывают исходный render.
+    """
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        _installed = True
+    from django.template.base import Node, Template
+    Template.render = _timed(
+        Template.render, lambda template: ('template', template.name)
+    )
+    Node.render_annotated = _timed(Node.render_annotated, node_name)
+
+
+@contextmanager
+def profile_rendering():
+    """Замерять отрисовку шаблонов в текущем потоке на время блока."""
+    install()
+    profile = _local.profile = RenderProfile()
+    try:
+        yield profile
+    finally:
+        _local.profile = None
@@ -0,0 +1,24 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.cache.pages import hole_markers
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **params):
+    """Подключить шаблон, который зависит от пользователя.
+
+    Работает как include, а в кешируемой оболочке страницы
+    (core/cache/pages.py) обрамляет кусок пометками, чтобы вошедшему
+    пользователю перерисовать его с параметрами params.
+    """
+    included = context.template.engine.get_template(template_name)
+    with context.push():
+        content = included.render(context)
+    request = context.get('request')
+    if getattr(request, 'page_shell', False):
+        start, end = hole_markers(template_name, params)
+        content = f'{start}{content}{end}'
+    return mark_safe(content)
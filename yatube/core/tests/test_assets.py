@@ -0,0 +1,216 @@
+import gzip
+import os
+import shutil
+import tempfile
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from ..assets.handler import IMMUTABLE, AssetsHandler, Mount, parse_range
+from ..assets.storage import CompressedManifestStorage
+
+CSS = b'body { color: black; }\n' * 100
+
+
+class CompressedManifestStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_collectstatic(self):
+        """collectstatic хеширует имена и сжимает текстовые файлы"""
+        storage = 'core.assets.storage.CompressedManifestStorage'
+        with override_settings(STATIC_ROOT=self.root,
+                               STATICFILES_STORAGE=storage):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            self.assertIsInstance(
+                staticfiles_storage._wrapped, CompressedManifestStorage
+            )
+            url = static('css/bootstrap.min.css')
+            placeholder = static('img/thumb_placeholder.svg')
+            hashed = set(staticfiles_storage.hashed_files.values())
+        name = url[len('/static/'):]
+        self.assertRegex(name, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        self.assertIn(name, hashed)
+        path = os.path.join(self.root, name)
+        with open(path, 'rb') as file, gzip.open(path + '.gz') as packed:
+            self.assertEqual(packed.read(), file.read())
+        # Картинки не сжимаются, маленькие файлы тоже.
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, placeholder[len('/static/'):] + '.gz')
+        ))
+        self.assertFalse(any(
+            name.endswith('.png.gz') for name in os.listdir(
+                os.path.join(self.root, 'img')
+            )
+        ))
+
+
+class ParseRangeTest(SimpleTestCase):
+    def test_ranges(self):
+        cases = (
+            ('bytes=0-9', (0, 9)),
+            ('bytes=10-', (10, 99)),
+            ('bytes=-10', (90, 99)),
+            ('bytes=90-1000', (90, 99)),
+            ('bytes=-1000', (0, 99)),
+            ('bytes=5-2', None),
+            ('bytes=0-1,5-6', None),
+            ('items=0-9', None),
+            ('bytes=x-', None),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 100), expected)
+
+
+class AssetsHandlerTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.static = os.path.join(self.directory, 'static')
+        self.media = os.path.join(self.directory, 'media')
+        os.makedirs(os.path.join(self.static, 'css'))
+        os.makedirs(self.media)
+        self.write(self.static, 'css/app.0123456789ab.css', CSS)
+        self.write(self.static, 'css/app.0123456789ab.css.gz',
+                   gzip.compress(CSS))
+        self.write(self.media, 'photo.jpg', bytes(range(256)))
+        self.write(self.directory, 'secret.txt', b'secret')
+        self.handler = AssetsHandler(self.application, mounts=[
+            Mount('/static/', self.static, 3600,
+                  immutable={'css/app.0123456789ab.css'}),
+            Mount('/media/', self.media, 86400),
+            Mount('https://cdn.example.com/assets/', self.static, 0),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, root, name, content):
+        with open(os.path.join(root, name), 'wb') as file:
+            file.write(content)
+
+    def application(self, environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'django']
+
+    def get(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method, **headers}
+        setup_testing_defaults(environ)
+        environ['wsgi.file_wrapper'] = FileWrapper
+        started = {}
+
+        def start_response(status, response_headers):
+            started['status'] = status
+            started['headers'] = dict(response_headers)
+
+        body = self.handler(environ, start_response)
+        try:
+            content = b''.join(body)
+        finally:
+            getattr(body, 'close', lambda: None)()
+        return started['status'], started['headers'], content, body
+
+    def test_hashed_static(self):
+        status, headers, content, body = self.get(
+            '/static/css/app.0123456789ab.css'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(content, CSS)
+        self.assertIsInstance(body, FileWrapper)
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(headers['Content-Length'], str(len(CSS)))
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Encoding', headers)
+
+    def test_media(self):
+        status, headers, content, body = self.get('/media/photo.jpg')
+        self.assertEqual(content, bytes(range(256)))
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=86400')
+        self.assertNotIn('Vary', headers)
+
+    def test_precompressed(self):
+        """gzip-копия отдаётся только тем, кто её принимает"""
+        path = '/static/css/app.0123456789ab.css'
+        status, headers, content, body = self.get(
+            path, HTTP_ACCEPT_ENCODING='br, gzip;q=0.8'
+        )
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(content), CSS)
+        self.assertEqual(headers['Content-Length'], str(len(content)))
+        status, headers, content, body = self.get(
+            path, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(content, CSS)
+
+    def test_conditional(self):
+        status, headers, content, body = self.get('/media/photo.jpg')
+        for name, value in (('HTTP_IF_NONE_MATCH', headers['ETag']),
+                            ('HTTP_IF_MODIFIED_SINCE',
+                             headers['Last-Modified'])):
+            with self.subTest(header=name):
+                status, cached, content, body = self.get(
+                    '/media/photo.jpg', **{name: value}
+                )
+                self.assertEqual(status, '304 Not Modified')
+                self.assertEqual(content, b'')
+                self.assertEqual(cached['ETag'], headers['ETag'])
+
+    def test_range(self):
+        status, headers, content, body = self.get(
+            '/media/photo.jpg', HTTP_RANGE='bytes=10-19'
+        )
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(content, bytes(range(10, 20)))
+        self.assertEqual(headers['Content-Range'], 'bytes 10-19/256')
+        self.assertEqual(headers['Content-Length'], '10')
+        status, headers, content, body = self.get(
+            '/media/photo.jpg', HTTP_RANGE='bytes=-6'
+        )
+        self.assertEqual(content, bytes(range(250, 256)))
+        status, headers, content, body = self.get(
+            '/media/photo.jpg', HTTP_RANGE='bytes=300-'
+        )
+        self.assertEqual(status, '416 Range Not Satisfiable')
+        self.assertEqual(headers['Content-Range'], 'bytes */256')
+        # If-Range со старым ETag: файл изменился, отдаётся целиком.
+        status, headers, content, body = self.get(
+            '/media/photo.jpg', HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(len(content), 256)
+
+    def test_head(self):
+        status, headers, content, body = self.get(
+            '/media/photo.jpg', method='HEAD'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Length'], '256')
+        self.assertEqual(content, b'')
+
+    def test_errors(self):
+        cases = (
+            ('/media/../secret.txt', 'GET', '404 Not Found'),
+            ('/media/missing.jpg', 'GET', '404 Not Found'),
+            ('/static/css/', 'GET', '404 Not Found'),
+            ('/media/photo.jpg', 'POST', '405 Method Not Allowed'),
+        )
+        for path, method, expected in cases:
+            with self.subTest(path=path, method=method):
+                status, headers, content, body = self.get(path, method)
+                self.assertEqual(status, expected)
+                self.assertEqual(content, b'')
+
+    def test_other_paths_go_to_django(self):
+        for path in ('/', '/staticx/app.css', '/assets/css/app.css'):
+            with self.subTest(path=path):
+                status, headers, content, body = self.get(path)
+                self.assertEqual(content, b'django')
@@ -0,0 +1,202 @@
+import socketserver
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..cache import config, invalidate, namespaced_key
+from ..cache.redis import RedisCache
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Заглушка сервера Redis: подмножество команд, которое нужно кешу."""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(value, bool):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, int):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self.reply(item)
+        elif value == 'OK':
+            self.wfile.write(b'+OK\r\n')
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper().decode()
+            self.reply(getattr(self, command.lower())(*args[1:]))
+
+    @property
+    def data(self):
+        store = self.server.store
+        now = time.monotonic()
+        for key in [k for k, (_, exp) in store.items() if exp and exp < now]:
+            del store[key]
+        return store
+
+    def get(self, key):
+        return self.data.get(key, (None, None))[0]
+
+    def mget(self, *keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        if b'NX' in options and key in self.data:
+            return None
+        expires = None
+        if b'PX' in options:
+            ms = int(options[options.index(b'PX') + 1])
+            expires = time.monotonic() + ms / 1000
+        self.data[key] = (value, expires)
+        return 'OK'
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        return key in self.data
+
+    def incrby(self, key, delta):
+        value, expires = self.data.get(key, (b'0', None))
+        value = int(value) + int(delta)
+        self.data[key] = (str(value).encode(), expires)
+        return value
+
+    def pexpire(self, key, ms):
+        if key not in self.data:
+            return 0
+        self.data[key] = (self.data[key][0],
+                          time.monotonic() + int(ms) / 1000)
+        return 1
+
+    def persist(self, key):
+        if key not in self.data:
+            return 0
+        self.data[key] = (self.data[key][0], None)
+        return 1
+
+    def flushdb(self):
+        self.data.clear()
+        return 'OK'
+
+
+setattr(RespHandler, 'del', RespHandler.delete)
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RespHandler)
+        self.store = {}
+
+
+class CacheSettingsTest(SimpleTestCase):
+    def test_backend_from_environment(self):
+        """Бэкенд кеша выбирается по YATUBE_CACHE_URL"""
+        cases = {
+            'locmem://': ('locmem', ''),
+            'file:///tmp/yatube': ('file', '/tmp/yatube'),
+            'db://cache_table': ('db', 'cache_table'),
+            'redis://cache:6380/2': ('redis', 'redis://cache:6380/2'),
+        }
+        for url, (backend, location) in cases.items():
+            with self.subTest(url=url):
+                default = config.cache_settings(
+                    {'YATUBE_CACHE_URL': url}
+                )['default']
+                self.assertEqual(default['BACKEND'],
+                                 config.BACKENDS[backend])
+                self.assertEqual(default['LOCATION'], location)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            config.cache_settings({'YATUBE_CACHE_URL': 'memcached://x'})
+
+
+class RedisCacheTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = RespServer()
+        threading.Thread(target=cls.server.serve_forever,
+                         daemon=True).start()
+        host, port = cls.server.server_address
+        cls.location = f'redis://{host}:{port}/0'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def backend(self):
+        """Отдельный экземпляр бэкенда — как в другом процессе"""
+        return RedisCache(self.location, {'KEY_PREFIX': 'yatube'})
+
+    def setUp(self):
+        self.backend().clear()
+
+    def test_basic_operations(self):
+        cache = self.backend()
+        cache.set('post', {'id': 1})
+        cache.set('counter', 10)
+        self.assertEqual(cache.get('post'), {'id': 1})
+        self.assertEqual(cache.incr('counter', 5), 15)
+        self.assertFalse(cache.add('post', 'другое значение'))
+        self.assertEqual(cache.get_many(['post', 'nothing']),
+                         {'post': {'id': 1}})
+        cache.delete_many(['post', 'counter'])
+        self.assertIsNone(cache.get('post'))
+        with self.assertRaises(ValueError):
+            cache.incr('counter')
+
+    def test_timeout(self):
+        cache = self.backend()
+        cache.set('short', 'значение', 0.05)
+        self.assertTrue(cache.has_key('short'))
+        time.sleep(0.1)
+        self.assertFalse(cache.has_key('short'))
+
+    def test_shared_between_processes(self):
+        """Запись одного процесса видна и сбрасывается в другом"""
+        writer, reader = self.backend(), self.backend()
+        writer.set('page', '<html>')
+        self.assertEqual(reader.get('page'), '<html>')
+        reader.delete('page')
+        self.assertIsNone(writer.get('page'))
+
+    def test_namespace_invalidation(self):
+        """Сброс пространства имён меняет ключи во всех процессах"""
+        first, second = self.backend(), self.backend()
+        with mock.patch('core.cache.cache', first):
+            key = namespaced_key('feed', 'page')
+            first.set(key, 'старая лента')
+        with mock.patch('core.cache.cache', second):
+            invalidate(namespace='feed')
+        with mock.patch('core.cache.cache', first):
+            new_key = namespaced_key('feed', 'page')
+        self.assertNotEqual(key, new_key)
+        self.assertIsNone(first.get(new_key))
@@ -0,0 +1,338 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import OperationalError, connections, transaction
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import AuthorStats, Comment, Post, User
+from ..db.config import database_settings, replica_aliases
+from ..db.middleware import PRIMARY_COOKIE, DeferredTransactionsMiddleware
+from ..db.router import (
+    ReplicaRouter, check_connections, has_written, read_from_replica,
+    start_request,
+)
+from ..db.sqlite3 import base as sqlite3_base
+from ..db.sqlite3.base import WriteQueue, defer_transactions
+
+REPLICAS = ['replica_1', 'replica_2']
+
+
+class DatabaseSettingsTest(SimpleTestCase):
+    def test_replicas_from_environ(self):
+        databases = database_settings('/srv', {
+            'YATUBE_DB_REPLICAS': '/r1.sqlite3, /r2.sqlite3',
+            'YATUBE_DB_CONN_MAX_AGE': '120',
+        })
+        self.assertEqual(replica_aliases(databases), REPLICAS)
+        self.assertEqual(databases['default']['NAME'], '/srv/db.sqlite3')
+        self.assertEqual(
+            databases['default']['ENGINE'], 'django.db.backends.sqlite3'
+        )
+        self.assertEqual(databases['replica_2']['NAME'], '/r2.sqlite3')
+        self.assertEqual(databases['replica_1']['CONN_MAX_AGE'], 120)
+        self.assertEqual(databases['replica_1']['TEST'], {'MIRROR': 'default'})
+
+    def test_tuned_engine(self):
+        databases = database_settings('/srv', {}, tuned=True)
+        self.assertEqual(databases['default']['ENGINE'], 'core.db.sqlite3')
+        databases = database_settings(
+            '/srv', {'YATUBE_DB_ENGINE': 'custom'}, tuned=True
+        )
+        self.assertEqual(databases['default']['ENGINE'], 'custom')
+
+    def test_no_replicas(self):
+        databases = database_settings('/srv', {})
+        self.assertEqual(list(databases), ['default'])
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 60)
+
+    @override_settings(DATABASE_REPLICAS=REPLICAS)
+    def test_no_migrations_on_replicas(self):
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica_1', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Реплики — файлы SQLite, скопированные с тестовой базы."""
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.author, text='Старый')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.copy_to_replicas()
+        # Этого поста реплики ещё «не получили».
+        self.fresh = Post.objects.create(author=self.author, text='Свежий')
+        cache.clear()
+
+    def tearDown(self):
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections.databases[alias]
+            delattr(connections._connections, alias)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def copy_to_replicas(self):
+        source = connections['default']
+        source.ensure_connection()
+        for alias in REPLICAS:
+            path = os.path.join(self.directory, f'{alias}.sqlite3')
+            target = sqlite3.connect(path)
+            source.connection.backup(target)
+            target.close()
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3', 'NAME': path,
+            }
+
+    def test_feed_reads_from_replica(self):
+        response = Client().get(reverse('posts:posts_index'))
+        self.assertContains(response, 'Старый')
+        self.assertNotContains(response, 'Свежий')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_other_views_read_from_primary(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+        response = self.reader_client.get(
+            reverse('posts:post_edit', args=[self.fresh.pk])
+        )
+        # Пост есть только в основной базе: чужой пост — редирект, не 404.
+        self.assertEqual(response.status_code, 302)
+
+    def test_read_your_writes(self):
+        response = self.reader_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        self.assertTrue(Comment.objects.filter(text='Комментарий').exists())
+        for alias in REPLICAS:
+            self.assertFalse(
+                Comment.objects.using(alias).filter(
+                    text='Комментарий'
+                ).exists()
+            )
+        # С кукой клиент читает основную базу и видит свою запись.
+        response = self.reader_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Комментарий')
+        response = self.reader_client.get(reverse('posts:posts_index'))
+        self.assertContains(response, 'Свежий')
+
+    def test_sessions_and_lookups_do_not_stick(self):
+        """Вход и get_or_create без записи не привязывают к основной базе"""
+        client = Client()
+        response = client.post(reverse('users:login'), {
+            'username': 'reader', 'password': 'wrong',
+        })
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        start_request(replica_reads=True)
+        try:
+            router = ReplicaRouter()
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertIn(router.db_for_read(Post), REPLICAS)
+            AuthorStats.objects.get_or_create(user=self.author)
+            Session.objects.create(
+                session_key='x', session_data='', expire_date=timezone.now()
+            )
+            self.assertFalse(has_written())
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'
+            )
+            self.assertTrue(has_written())
+        finally:
+            start_request()
+
+    def test_streaming_reads_from_replica(self):
+        """Потоковый ответ читает реплику и после выхода из view"""
+        response = Client().get(reverse('posts:api_posts'), {
+            'ids': f'{self.post.pk},{self.fresh.pk}',
+        })
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('Старый', content)
+        self.assertNotIn('Свежий', content)
+
+
+class HealthCheckTest(TransactionTestCase):
+    def test_broken_connection_is_closed(self):
+        connection = connections['default']
+        connection.ensure_connection()
+        connection.health_checked_at = None
+        with mock.patch.object(connection, 'is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            check_connections()
+        close.assert_called_once_with()
+
+    def test_checks_are_throttled(self):
+        connection = connections['default']
+        connection.ensure_connection()
+        connection.health_checked_at = None
+        with mock.patch.object(
+            connection, 'is_usable', return_value=True
+        ) as is_usable:
+            check_connections()
+            check_connections()
+        self.assertEqual(is_usable.call_count, 1)
+
+
+class SQLiteBackendTest(TransactionTestCase):
+    """core.db.sqlite3 на отдельном файле базы."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        connections.databases['tuned'] = {
+            'ENGINE': 'core.db.sqlite3',
+            'NAME': os.path.join(self.directory, 'tuned.sqlite3'),
+            'OPTIONS': {'pragmas': {'cache_size': -1024}, 'timeout': 0.5},
+        }
+        with connections['tuned'].cursor() as cursor:
+            cursor.execute('CREATE TABLE hits (id INTEGER PRIMARY KEY)')
+
+    def tearDown(self):
+        connections['tuned'].close()
+        del connections.databases['tuned']
+        delattr(connections._connections, 'tuned')
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def pragma(self, name):
+        with connections['tuned'].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -1024)
+
+    def test_concurrent_transactions(self):
+        """Параллельные транзакции записи не получают «database is locked»"""
+        errors = []
+
+        def write():
+            try:
+                for _ in range(20):
+                    with transaction.atomic(using='tuned'):
+                        with connections['tuned'].cursor() as cursor:
+                            cursor.execute('SELECT COUNT(*) FROM hits')
+                            cursor.execute('INSERT INTO hits DEFAULT VALUES')
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections['tuned'].close()
+
+        threads = [threading.Thread(target=write) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with connections['tuned'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM hits')
+            self.assertEqual(cursor.fetchone()[0], 160)
+        self.assertFalse(connections['tuned'].holds_write_queue)
+
+    def test_rollback_releases_queue(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic(using='tuned'):
+                raise ValueError
+        # Следующая транзакция не ждёт вечно.
+        with transaction.atomic(using='tuned'):
+            pass
+
+    def test_queue_wait_is_bounded(self):
+        connection = connections['tuned']
+        connection.ensure_connection()
+        connection.write_queue.acquire()
+        try:
+            with self.assertRaisesMessage(
+                    OperationalError, 'database is locked'):
+                with transaction.atomic(using='tuned'):
+                    pass
+        finally:
+            connection.write_queue.release()
+        # Брошенный билет пропускается, очередь не встаёт.
+        with transaction.atomic(using='tuned'):
+            self.assertTrue(connection.holds_write_queue)
+        self.assertFalse(connection.holds_write_queue)
+
+    def test_deferred_transactions(self):
+        connection = connections['tuned']
+        defer_transactions()
+        try:
+            with transaction.atomic(using='tuned'):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM hits')
+                    self.assertFalse(connection.holds_write_queue)
+                    cursor.execute('INSERT INTO hits DEFAULT VALUES')
+                    self.assertTrue(connection.holds_write_queue)
+        finally:
+            defer_transactions(False)
+        self.assertFalse(connection.holds_write_queue)
+
+
+class DeferredTransactionsMiddlewareTest(SimpleTestCase):
+    def test_only_reading_views_deferred(self):
+        deferred = []
+        middleware = DeferredTransactionsMiddleware(
+            lambda request: deferred.append(sqlite3_base._local.deferred)
+        )
+        reading = read_from_replica(lambda request: None)
+        factory = RequestFactory()
+        for request, view, expected in (
+            (factory.get('/'), reading, True),
+            (factory.post('/'), reading, False),
+            (factory.get('/'), lambda request: None, False),
+        ):
+            with self.subTest(method=request.method, expected=expected):
+                middleware.process_view(request, view, (), {})
+                middleware(request)
+                self.assertEqual(deferred.pop(), expected)
+                self.assertFalse(sqlite3_base._local.deferred)
+
+
+class WriteQueueTest(SimpleTestCase):
+    def test_first_come_first_served(self):
+        queue, order = WriteQueue(), []
+        queue.acquire()
+        threads = []
+        for number in range(3):
+            thread = threading.Thread(
+                target=lambda number=number: (
+                    queue.acquire(), order.append(number), queue.release()
+                )
+            )
+            thread.start()
+            # Следующий поток встаёт в очередь после предыдущего.
+            while queue.next_ticket != number + 2:
+                pass
+            threads.append(thread)
+        queue.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_timeout_skips_ticket(self):
+        queue = WriteQueue()
+        queue.acquire()
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            queue.acquire(timeout=0.01)
+        queue.release()
+        self.assertEqual(queue.serving, 2)
+        queue.acquire(timeout=0.01)
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post, User
+
+
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='auth')
+        Post.objects.create(author=user, text='Тестовый текст')
+
+    def setUp(self):
+        cache.clear()
+        self.registry = metrics.Registry(100)
+        for target in ('core.metrics.middleware.registry',
+                       'core.views.registry'):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        client = Client()
+        response = client.get(reverse('posts:posts_index'))
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('cache;desc="hit=', timing)
+        client.get(reverse('posts:posts_index'))
+        counters = self.registry.counters['posts:posts_index']
+        self.assertEqual(counters['sampled'], 2)
+        self.assertGreater(counters['db_queries'], 0)
+        self.assertGreater(counters['template_seconds'], 0)
+        # Второй раз карточка поста берётся из кеша.
+        self.assertGreater(counters['cache_hits'], 0)
+        self.assertGreater(counters['cache_misses'], 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_not_sampled_request(self):
+        response = Client().get(reverse('posts:posts_index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(self.registry.requests['posts:posts_index'], 1)
+        self.assertNotIn('posts:posts_index', self.registry.counters)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_metrics_endpoint(self):
+        client = Client()
+        client.get(reverse('posts:posts_index'))
+        client.get('/missing-page/')
+        response = client.get(reverse('metrics'))
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{view="posts:posts_index"} 1', text
+        )
+        self.assertIn('{view="unresolved"}', text)
+        self.assertIn('quantile="0.99"', text)
+
+    def test_metrics_endpoint_closed(self):
+        response = Client(REMOTE_ADDR='10.0.0.1').get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_metrics_behind_proxy(self):
+        """За прокси на том же хосте решает адрес из X-Forwarded-For"""
+        response = Client(
+            HTTP_X_FORWARDED_FOR='203.0.113.7, 127.0.0.1'
+        ).get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        url = reverse('metrics')
+        self.assertEqual(Client().get(url).status_code, 404)
+        response = Client(
+            REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer wrong'
+        ).get(url)
+        self.assertEqual(response.status_code, 404)
+        response = Client(
+            REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer secret'
+        ).get(url)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_SAMPLE_RATE=1, VIEW_TEMPLATE_ENGINES={
+        'posts:posts_index': 'jinja2',
+    })
+    def test_jinja2_templates_timed(self):
+        Client().get(reverse('posts:posts_index'))
+        counters = self.registry.counters['posts:posts_index']
+        self.assertGreater(counters['template_seconds'], 0)
+
+
+class RegistryTest(TestCase):
+    def test_quantiles_window(self):
+        registry = metrics.Registry(buffer_size=10)
+        for i in range(1, 101):
+            registry.add('view', i / 1000)
+        text = registry.render()
+        # Квантили по последним десяти запросам, счётчики — по всем.
+        self.assertIn('{view="view",quantile="0.5"} 0.096000', text)
+        self.assertIn('yatube_request_duration_seconds_count'
+                      '{view="view"} 100', text)
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from ..apps import check_templates
+from ..rendering import profile_rendering, warm_templates
+
+CACHED_LOADER = [('django.template.loaders.cached.Loader', [
+    'django.template.loaders.filesystem.Loader',
+])]
+
+
+class WarmTemplatesTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'includes'))
+        self.write('page.html', '{% include "includes/part.html" %}')
+        self.write('includes/part.html', 'Часть')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        with open(os.path.join(self.directory, name), 'w') as file:
+            file.write(content)
+
+    def templates(self):
+        return override_settings(TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [self.directory],
+            'OPTIONS': {'loaders': CACHED_LOADER},
+        }])
+
+    def test_project_templates_compile(self):
+        self.assertEqual(warm_templates(), [])
+        self.assertEqual(check_templates(None), [])
+
+    def test_fills_cached_loader(self):
+        with self.templates():
+            self.assertEqual(warm_templates(), [])
+            loader = engines['django'].engine.template_loaders[0]
+            self.assertEqual(
+                set(loader.get_template_cache),
+                {'page.html', 'includes/part.html'}
+            )
+
+    def test_reports_syntax_errors(self):
+        self.write('includes/broken.html', '{% if %}')
+        with self.templates():
+            errors = warm_templates()
+            self.assertEqual(len(errors), 1)
+            self.assertTrue(errors[0].startswith('includes/broken.html: '))
+            self.assertEqual(
+                [error.id for error in check_templates(None)], ['core.E001']
+            )
+
+
+class RenderProfileTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create([
+            Post(author=author, text=f'Пост {i}') for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_profile_index(self):
+        with profile_rendering() as profile:
+            Client().get(reverse('posts:posts_index'))
+        stats = {(kind, name): calls for kind, name, calls, total, mean
+                 in profile.rows()}
+        self.assertEqual(stats['template', 'posts/index.html'], 1)
+        self.assertEqual(
+            stats['include', 'posts/includes/post_card.html'], 3
+        )
+        self.assertEqual(stats['tag', 'cache post_card'], 3)
+        self.assertEqual(stats['tag', 'hole includes/header.html'], 1)
+        self.assertIn('posts/index.html', profile.report())
+
+    def test_off_outside_block(self):
+        with profile_rendering() as profile:
+            pass
+        Client().get(reverse('posts:posts_index'))
+        self.assertEqual(profile.rows(), [])
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'profile_templates', reverse('posts:posts_index'),
+            '--requests', '2', stdout=out
+        )
+        self.assertIn('include  posts/includes/post_card.html', out.getvalue())
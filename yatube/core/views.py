@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from .metrics import registry
 
 
 def page_not_found(request, exception):
@@ -6,8 +11,42 @@ def page_not_found(request, exception):
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
+    return render(request, 'core/403csrf.html', status=403)
 
 
 def internal_error(request, reason=''):
-    return render(request, 'core/500.html')
+    return render(request, 'core/500.html', status=500)
+
+
+def metrics_allowed(request):
+    """Пускать ли запрос к /metrics.
+
+    С METRICS_TOKEN нужен заголовок Authorization: Bearer <токен>. Без
+    него — адрес клиента из METRICS_ALLOWED_IPS; за прокси (на том же
+    хосте REMOTE_ADDR у всех 127.0.0.1) в списке должны быть и все
+    адреса из X-Forwarded-For.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        return constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
+    allowed = settings.METRICS_ALLOWED_IPS
+    forwarded = [
+        address.strip() for address
+        in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+        if address.strip()
+    ]
+    return (
+        request.META.get('REMOTE_ADDR') in allowed
+        and all(address in allowed for address in forwarded)
+    )
+
+
+def metrics(request):
+    """Метрики процесса в формате Prometheus, только для своих."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,12 +1,38 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Post, Group, Comment
+from .models import Post, Group, Comment, SearchToken
+from .search import SEARCH_LIMIT, search_documents
 
 
-class PostAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    """Поиск в админке через поисковый индекс вместо LIKE '%слово%'.
+
+    Индекс отдаёт не больше SEARCH_LIMIT лучших совпадений; если их
+    столько и набралось, над списком выводится предупреждение.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = search_documents(
+            self.search_kind, search_term, limit=SEARCH_LIMIT
+        )
+        if len(ids) >= SEARCH_LIMIT:
+            self.message_user(
+                request,
+                f'Показаны {SEARCH_LIMIT} лучших совпадений, '
+                'уточните запрос, чтобы увидеть остальные.',
+                messages.WARNING,
+            )
+        return queryset.filter(pk__in=ids), False
+
+
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'created', 'author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
+    search_kind = SearchToken.POST
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
@@ -16,9 +42,10 @@ class GroupAdmin(admin.ModelAdmin):
     search_fields = ('title',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'created')
     search_fields = ('text',)
+    search_kind = SearchToken.COMMENT
     list_filter = ('created',)
 
 
@@ -0,0 +1,169 @@
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from core.db.router import read_from_replica
+from core.paginator import CursorPaginator
+from .models import Group, Post
+from .timeline import TimelinePaginator
+
+# Поля поста в API: имя в ответе -> поле для .values().
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+# Ключ курсора выбирается всегда, даже если этих полей не просили.
+CURSOR_FIELDS = ('created', 'id')
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_IDS = 100
+
+
+class ApiError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_view(view):
+    """Только GET; ApiError превращается в JSON-ответ с ошибкой."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(
+                {'error': str(error)}, status=error.status,
+                json_dumps_params={'ensure_ascii': False}
+            )
+    return wrapper
+
+
+def parse_fields(raw):
+    """Имена полей из ?fields=id,text,author; по умолчанию все."""
+    if not raw:
+        return list(FIELDS)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown or not names:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def parse_ids(raw):
+    """Номера постов из ?ids=1,2,3."""
+    try:
+        ids = [int(pk) for pk in raw.split(',')]
+    except ValueError:
+        raise ApiError('ids — номера постов через запятую')
+    if len(ids) > MAX_IDS:
+        raise ApiError(f'Не больше {MAX_IDS} номеров за запрос')
+    return ids
+
+
+def parse_limit(raw):
+    if not raw:
+        return PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ApiError('limit — целое число')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(f'limit — от 1 до {MAX_PAGE_SIZE}')
+    return limit
+
+
+def serialize(row, names):
+    """Словарь поста из строки .values(), без объекта модели."""
+    data = {name: row[FIELDS[name]] for name in names}
+    if data.get('image') is not None:
+        data['image'] = (
+            default_storage.url(data['image']) if data['image'] else None
+        )
+    return data
+
+
+def stream(rows, names, **extra):
+    """Ответ {"results": [...], **extra}, который пишется по частям.
+
+    rows может быть итератором .iterator(): посты читаются из базы по
+    мере отдачи ответа.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def chunks():
+        yield '{"results":['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + encoder.encode(serialize(row, names))
+        yield ']'
+        for key, value in extra.items():
+            yield f',{encoder.encode(key)}:{encoder.encode(value)}'
+        yield '}'
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
+
+
+def feed(request, queryset, paginator=None):
+    """Лента queryset (тот же for_feed(), что и в HTML) в JSON.
+
+    ?ids= отдаёт посты ленты с этими номерами, иначе — страницу по
+    курсору ?cursor= размером ?limit=. paginator(values, limit) строит
+    паджинатор, если лента не выбирается одним queryset.
+    """
+    names = parse_fields(request.GET.get('fields'))
+    values = queryset.values(
+        *{FIELDS[name] for name in names}.union(CURSOR_FIELDS)
+    )
+    if request.GET.get('ids'):
+        ids = parse_ids(request.GET['ids'])
+        return stream(values.filter(pk__in=ids).iterator(), names)
+    limit = parse_limit(request.GET.get('limit'))
+    if paginator is None:
+        pages = CursorPaginator(values, limit)
+    else:
+        pages = paginator(values, limit)
+    page = pages.get_page(request.GET.get('cursor'))
+    return stream(
+        page.object_list, names,
+        next=pages.next_cursor, previous=pages.previous_cursor,
+    )
+
+
+@read_from_replica
+@api_view
+def posts(request):
+    return feed(request, Post.objects.for_feed())
+
+
+@read_from_replica
+@api_view
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is None:
+        raise ApiError('Группа не найдена', status=404)
+    return feed(request, Post.objects.for_feed().filter(group_id=group_id))
+
+
+@api_view
+def follow(request):
+    user = request.user
+    if not user.is_authenticated:
+        raise ApiError('Нужно войти', status=403)
+    return feed(
+        request,
+        Post.objects.for_feed().filter(author__following__user=user),
+        lambda values, limit: TimelinePaginator(
+            user, limit, object_list=values
+        ),
+    )
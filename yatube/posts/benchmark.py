@@ -0,0 +1,417 @@
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, transaction
+from django.template import engines
+from django.template.base import Template
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, ContextList, instrumented_test_render
+)
+from django.urls import reverse
+from faker import Faker
+from mixer.backend.django import mixer
+
+from .models import Comment, Follow, Group, Post, User
+from .search import tokenize
+
+# Страницы, которые меряет бенчмарк: имя -> (метод, нужен ли вход).
+TARGETS = {
+    'index': ('GET', False),
+    'group_posts': ('GET', False),
+    'profile': ('GET', False),
+    'post_detail': ('GET', False),
+    'search': ('GET', False),
+    'follow_index': ('GET', True),
+    'add_comment': ('POST', True),
+}
+# Смешанная нагрузка: страницы чтения и записи, которые идут вперемешку.
+MIXED_READS = ('index', 'profile', 'post_detail')
+MIXED_WRITES = ('add_comment',)
+# Страницы лент, у которых есть шаблоны для Django и Jinja2.
+TEMPLATE_PAGES = {
+    'index': 'posts/index.html',
+    'group_posts': 'posts/group_list.html',
+    'profile': 'posts/profile.html',
+    'follow_index': 'posts/follow.html',
+}
+TEMPLATE_ENGINES = ('django', 'jinja2')
+PERCENTILES = (50, 95, 99)
+# Рост p95 меньше этого порога считается шумом, а не регрессией.
+MIN_LATENCY_REGRESSION_MS = 1.0
+
+
+def seed(users=20, groups=5, posts=200, comments=400, follows=60,
+         random_seed=0):
+    """Заполнить базу синтетическими данными через mixer и Faker.
+
+    Первый пользователь — читатель: он подписан на всех остальных, от
+    его имени открывается лента подписок и пишутся комментарии. Ещё
+    follows подписок раздаются случайно.
+    Возвращает описание набора для построения запросов.
+    """
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    with transaction.atomic():
+        authors = mixer.cycle(users).blend(
+            User, username=mixer.sequence('bench_{0}')
+        )
+        group_list = mixer.cycle(groups).blend(
+            Group,
+            slug=mixer.sequence('bench-{0}'),
+            title=mixer.sequence('Группа {0}'),
+            description=lambda: fake.sentence(),
+        )
+        post_list = [
+            mixer.blend(
+                Post, author=rng.choice(authors),
+                group=rng.choice(group_list + [None]),
+                text=fake.text(), image='', comment=None
+            )
+            for _ in range(posts)
+        ]
+        for _ in range(comments):
+            mixer.blend(
+                Comment, post=rng.choice(post_list),
+                author=rng.choice(authors), text=fake.sentence()
+            )
+        reader, others = authors[0], authors[1:]
+        pairs = [
+            (user, author) for user in others for author in authors
+            if user != author
+        ]
+        pairs = [(reader, author) for author in others] + rng.sample(
+            pairs, min(follows, len(pairs))
+        )
+        for user, author in pairs:
+            mixer.blend(Follow, user=user, author=author)
+    words = sorted({
+        word for post in post_list[:50] for word in tokenize(post.text)
+        if len(word) > 3
+    })
+    return {
+        'reader': reader.username,
+        'usernames': [user.username for user in authors],
+        'slugs': [group.slug for group in group_list],
+        'post_ids': [post.id for post in post_list],
+        'words': words,
+        'size': {
+            'users': users, 'groups': groups, 'posts': posts,
+            'comments': comments, 'follows': follows,
+        },
+    }
+
+
+def request_for(name, dataset, rng):
+    """Метод, путь и параметры очередного запроса к странице name."""
+    if name == 'index':
+        return 'GET', reverse('posts:posts_index'), None
+    if name == 'group_posts':
+        slug = rng.choice(dataset['slugs'])
+        return 'GET', reverse('posts:posts_group', args=[slug]), None
+    if name == 'profile':
+        username = rng.choice(dataset['usernames'])
+        return 'GET', reverse('posts:profile', args=[username]), None
+    if name == 'post_detail':
+        post_id = rng.choice(dataset['post_ids'])
+        return 'GET', reverse('posts:post_detail', args=[post_id]), None
+    if name == 'search':
+        return 'GET', reverse('posts:search'), {
+            'q': rng.choice(dataset['words'] or ['пост'])
+        }
+    if name == 'follow_index':
+        return 'GET', reverse('posts:follow_index'), None
+    if name == 'add_comment':
+        post_id = rng.choice(dataset['post_ids'])
+        return 'POST', reverse('posts:add_comment', args=[post_id]), {
+            'text': 'Комментарий бенчмарка'
+        }
+    raise ValueError(f'Неизвестная страница {name}')
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, sizes, errors, queries=None):
+    result = {'requests': len(latencies), 'errors': errors}
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent), 3)
+    result['mean_ms'] = round(sum(latencies) / len(latencies), 3)
+    result['bytes'] = round(sum(sizes) / len(sizes))
+    if queries is not None:
+        result['queries'] = round(sum(queries) / len(queries), 2)
+    return result
+
+
+def run_client(dataset, names, requests, random_seed=0):
+    """Прогнать страницы через тестовый клиент Django в одном потоке.
+
+    Кроме времени считает SQL-запросы на страницу и размер ответа.
+    """
+    rng = random.Random(random_seed)
+    anonymous, reader = Client(), Client()
+    reader.force_login(User.objects.get(username=dataset['reader']))
+    results = {}
+    for name in names:
+        needs_login = TARGETS[name][1]
+        client = reader if needs_login else anonymous
+        cache.clear()
+        latencies, sizes, queries, errors = [], [], [], 0
+        for _ in range(requests):
+            method, path, data = request_for(name, dataset, rng)
+            send = client.post if method == 'POST' else client.get
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = send(path, data)
+                latencies.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            sizes.append(len(response.content))
+            errors += response.status_code >= 400
+        results[name] = summarize(latencies, sizes, errors, queries)
+    return results
+
+
+@contextmanager
+def captured_contexts():
+    """Сохранять контекст шаблонов в response.context тестового клиента.
+
+    Так делает тестовое окружение Django; здесь — только на время блока.
+    """
+    render = Template._render
+    Template._render = instrumented_test_render
+    try:
+        yield
+    finally:
+        Template._render = render
+
+
+def page_context(client, name, dataset, rng):
+    """Контекст, который view страницы name отдаёт шаблону, и запрос."""
+    method, path, data = request_for(name, dataset, rng)
+    with captured_contexts():
+        response = client.get(path, data)
+    context = response.context
+    if isinstance(context, ContextList):
+        context = context[0]
+    return context.flatten(), response.wsgi_request
+
+
+def run_templates(dataset, names, requests, aliases=TEMPLATE_ENGINES,
+                  random_seed=0):
+    """Время отрисовки шаблонов лент каждым движком из aliases.
+
+    Контекст и запрос берутся у view один раз, и все движки рисуют
+    страницу с одним и тем же контекстом, без view и SQL.
+    """
+    rng = random.Random(random_seed)
+    reader = Client()
+    reader.force_login(User.objects.get(username=dataset['reader']))
+    results = {alias: {} for alias in aliases}
+    for name in names:
+        cache.clear()
+        context, request = page_context(reader, name, dataset, rng)
+        for alias in aliases:
+            template = engines[alias].get_template(TEMPLATE_PAGES[name])
+            latencies, sizes = [], []
+            for _ in range(requests):
+                start = time.perf_counter()
+                content = template.render(dict(context), request)
+                latencies.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(content))
+            results[alias][name] = summarize(latencies, sizes, 0)
+    return results
+
+
+class ThreadedWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _auth_headers(dataset):
+    """Cookie сессии читателя и CSRF-токен для запросов по HTTP."""
+    client = Client()
+    client.force_login(User.objects.get(username=dataset['reader']))
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    request = HttpRequest()
+    token = get_token(request)
+    return {
+        'Cookie': (
+            f'{settings.SESSION_COOKIE_NAME}={session}; '
+            f'{settings.CSRF_COOKIE_NAME}={request.META["CSRF_COOKIE"]}'
+        ),
+        'X-CSRFToken': token,
+    }
+
+
+def _http_request(port, method, path, data, headers):
+    headers = dict(headers)
+    body = None
+    if data and method == 'POST':
+        body = urlencode(data)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    elif data:
+        path = f'{path}?{urlencode(data)}'
+    client = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        start = time.perf_counter()
+        client.request(method, path, body, headers)
+        response = client.getresponse()
+        content = response.read()
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        client.close()
+    return elapsed, len(content), response.status
+
+
+@contextmanager
+def wsgi_server():
+    """Многопоточный WSGI-сервер проекта на свободном порту."""
+    server = make_server(
+        '127.0.0.1', 0, get_wsgi_application(),
+        server_class=ThreadedWSGIServer, handler_class=QuietHandler
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_wsgi(dataset, names, requests, concurrency=4, random_seed=0):
+    """Прогнать страницы через многопоточный WSGI-сервер по HTTP.
+
+    Запросы каждой страницы идут параллельно в concurrency потоков,
+    поэтому в задержки входят и ожидание блокировок базы, и очередь.
+    """
+    rng = random.Random(random_seed)
+    auth = _auth_headers(dataset)
+    results = {}
+    with wsgi_server() as port:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name in names:
+                needs_login = TARGETS[name][1]
+                headers = auth if needs_login else {}
+                cache.clear()
+                calls = [
+                    request_for(name, dataset, rng) for _ in range(requests)
+                ]
+                responses = list(pool.map(
+                    lambda call: _http_request(port, *call, headers), calls
+                ))
+                results[name] = summarize(
+                    [elapsed for elapsed, size, status in responses],
+                    [size for elapsed, size, status in responses],
+                    sum(status >= 400 for elapsed, size, status in responses)
+                )
+    return results
+
+
+def run_mixed(dataset, requests, concurrency=4, write_share=0.25,
+              random_seed=0):
+    """Чтение и запись вперемешку через WSGI-сервер.
+
+    requests запросов, из них доля write_share — комментарии читателя,
+    остальное — анонимное чтение MIXED_READS. Возвращает для чтения и
+    записи задержки, ошибки (в том числе «database is locked») и
+    пропускную способность rps за время всего прогона.
+    """
+    rng = random.Random(random_seed)
+    auth = _auth_headers(dataset)
+    calls = []
+    for _ in range(requests):
+        if rng.random() < write_share:
+            name, kind, headers = rng.choice(MIXED_WRITES), 'write', auth
+        else:
+            name, kind, headers = rng.choice(MIXED_READS), 'read', {}
+        calls.append((kind, request_for(name, dataset, rng), headers))
+    cache.clear()
+    with wsgi_server() as port:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            responses = list(pool.map(
+                lambda call: (call[0], *_http_request(
+                    port, *call[1], call[2]
+                )),
+                calls
+            ))
+            elapsed = time.perf_counter() - start
+    results = {}
+    for kind in ('read', 'write'):
+        done = [
+            (latency, size, status)
+            for name, latency, size, status in responses if name == kind
+        ]
+        if not done:
+            continue
+        result = summarize(
+            [latency for latency, size, status in done],
+            [size for latency, size, status in done],
+            sum(status >= 400 for latency, size, status in done),
+        )
+        result['rps'] = round(len(done) / elapsed, 1)
+        results[kind] = result
+    return results
+
+
+def compare(current, baseline, tolerance=0.2):
+    """Регрессии текущего прогона относительно сохранённого.
+
+    Регрессия — рост p95 больше чем на tolerance (и не меньше
+    MIN_LATENCY_REGRESSION_MS) или рост числа запросов на страницу.
+    """
+    regressions = []
+    for driver, pages in current['results'].items():
+        for name, result in pages.items():
+            base = baseline.get('results', {}).get(driver, {}).get(name)
+            if base is None:
+                continue
+            p95, base_p95 = result['p95_ms'], base['p95_ms']
+            if (p95 > base_p95 * (1 + tolerance)
+                    and p95 - base_p95 >= MIN_LATENCY_REGRESSION_MS):
+                regressions.append(
+                    f'{driver}/{name}: p95 {base_p95} -> {p95} мс'
+                )
+            if result.get('queries', 0) > base.get('queries', math.inf):
+                regressions.append(
+                    f'{driver}/{name}: запросов {base["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+        file.write('\n')
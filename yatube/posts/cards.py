@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils import timezone
+
+# Фрагменты карточки в шаблонах Django и Jinja2.
+CARD_FRAGMENTS = ('post_card', 'post_card_jinja')
+# Варианты разметки карточки из posts/includes/post_card.html.
+CARD_VARIANTS = ('', 'index', 'profile')
+
+
+def card_keys(post_id, version):
+    return [
+        make_template_fragment_key(fragment, [post_id, version, card])
+        for fragment in CARD_FRAGMENTS for card in CARD_VARIANTS
+    ]
+
+
+def invalidate(post_id, version):
+    """Удалить закешированные карточки одной версии поста."""
+    cache.delete_many(card_keys(post_id, version))
+
+
+def touch(posts):
+    """Сменить версию карточек у постов из queryset одним UPDATE."""
+    posts.update(updated=timezone.now())
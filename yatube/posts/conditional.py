@@ -0,0 +1,103 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .follow import followees_version
+from .models import Comment, Post
+
+# Время последнего удаления поста: после удаления максимум дат в ленте
+# может не измениться. Если ключа в кеше нет, удалением считается
+# текущий момент — страница просто отдаётся заново.
+DELETED_KEY = 'posts:deleted'
+
+
+def conditional_page(state):
+    """Декоратор условного GET: ETag и Last-Modified по состоянию страницы.
+
+    state(request, **kwargs) возвращает время последнего изменения данных
+    страницы и кортеж всего остального, от чего зависит разметка. Если
+    валидаторы совпали с If-None-Match / If-Modified-Since, отдаётся 304
+    без запроса ленты и рендера шаблона.
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            request._page_validators = _validators(
+                request, *state(request, *args, **kwargs)
+            )
+        return request._page_validators
+
+    def etag(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return validators(request, *args, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def _validators(request, modified, parts):
+    if modified is None:
+        return None, None
+    user = request.user
+    if user.is_authenticated:
+        # Шапка, кнопки и CSRF-токен в форме у каждого пользователя свои,
+        # поэтому Last-Modified ему не отдаётся — только ETag.
+        parts += (user.pk, request.META.get('CSRF_COOKIE'))
+    tag = hashlib.md5(repr((modified, parts)).encode()).hexdigest()
+    return tag, None if user.is_authenticated else modified
+
+
+def mark_deleted():
+    cache.set(DELETED_KEY, timezone.now(), None)
+
+
+def _feed_state(posts):
+    # updated меняется и без правки самого поста: когда готово превью,
+    # меняется группа или имя автора (cards.touch). Поэтому максимум
+    # покрывает всё, что видно в карточках ленты.
+    modified = posts.aggregate(modified=Max('updated'))['modified']
+    if modified is None:
+        return None, ()
+    deleted = cache.get_or_set(DELETED_KEY, timezone.now, None)
+    return max(modified, deleted), ()
+
+
+def index_state(request):
+    return _feed_state(Post.objects.all())
+
+
+def group_state(request, slug):
+    return _feed_state(Post.objects.filter(group__slug=slug))
+
+
+def profile_state(request, username):
+    modified, parts = _feed_state(
+        Post.objects.filter(author__username=username)
+    )
+    if modified is not None and request.user.is_authenticated:
+        # Метка подписок пользователя из кеша: без запроса к базе.
+        parts += (followees_version(request.user.pk),)
+    return modified, parts
+
+
+def post_detail_state(request, post_id):
+    # Последний комментарий берётся подзапросом по индексу (post,
+    # created), удаления видны по счётчику comment_count.
+    last_comment = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by('-created').values('created')[:1]
+    state = Post.objects.filter(pk=post_id).annotate(
+        last_comment=Subquery(last_comment)
+    ).values(
+        'updated', 'last_comment', 'comment_count',
+        'author__stats__post_count',
+    ).order_by().first()
+    if state is None:
+        return None, ()
+    modified = max(filter(None, (state['updated'], state['last_comment'])))
+    return modified, (
+        state['comment_count'], state['author__stats__post_count']
+    )
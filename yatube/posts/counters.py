@@ -0,0 +1,91 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def stats_for(user):
+    """Счётчики пользователя; строка создаётся, если её ещё нет."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        user.stats = AuthorStats.objects.get_or_create(user=user)[0]
+        return user.stats
+
+
+def change(queryset, field, delta):
+    """Атомарно сдвинуть счётчик одним UPDATE, без чтения строки."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def change_author(user_id, field, delta):
+    if user_id is not None:
+        change(AuthorStats.objects.filter(user_id=user_id), field, delta)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        change(Group.objects.filter(pk=group_id), 'post_count', delta)
+
+
+def change_post(post_id, delta):
+    change(Post.objects.filter(pk=post_id), 'comment_count', delta)
+
+
+def _count(queryset, field):
+    """Подзапрос COUNT(*) по внешнему ключу field для recount."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def recount():
+    """Пересчитать все счётчики по данным и исправить расхождения.
+
+    Возвращает количество исправленных строк.
+    """
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk) for pk in User.objects.filter(
+            stats__isnull=True
+        ).values_list('pk', flat=True)],
+        ignore_conflicts=True
+    )
+    real = {
+        'post_count': _count(Post.objects.all(), 'author'),
+        'comment_count': _count(Comment.objects.all(), 'author'),
+        'follower_count': _count(Follow.objects.all(), 'author'),
+        'following_count': _count(Follow.objects.all(), 'user'),
+    }
+    drifted = AuthorStats.objects.annotate(
+        **{f'real_{name}': value for name, value in real.items()}
+    ).exclude(**{name: F(f'real_{name}') for name in real})
+    fixed = 0
+    for row in drifted.iterator():
+        AuthorStats.objects.filter(pk=row.pk).update(
+            **{name: getattr(row, f'real_{name}') for name in real}
+        )
+        fixed += 1
+    groups = Group.objects.annotate(
+        real_post_count=_count(Post.objects.all(), 'group')
+    ).exclude(post_count=F('real_post_count'))
+    for group in groups.iterator():
+        Group.objects.filter(pk=group.pk).update(
+            post_count=group.real_post_count
+        )
+        fixed += 1
+    posts = Post.objects.annotate(
+        real_comment_count=_count(Comment.objects.all(), 'post')
+    ).exclude(comment_count=F('real_comment_count')).only('pk')
+    for post in posts.iterator():
+        Post.objects.filter(pk=post.pk).update(
+            comment_count=post.real_comment_count
+        )
+        fixed += 1
+    return fixed
@@ -0,0 +1,89 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import invalidate, namespaced_key
+from .models import Follow
+
+# Подписки в кеше: для каждой проверенной пары (читатель, автор) — флаг
+# подписки, для читателя — метка его подписок для ETag. Сбрасываются
+# сигналами Follow (forget), поэтому живут долго.
+NAMESPACE = 'follow'
+TIMEOUT = 60 * 60 * 24
+
+
+def _pair_key(user_id, author_id):
+    return namespaced_key(NAMESPACE, f'pair:{user_id}:{author_id}')
+
+
+def _version_key(user_id):
+    return namespaced_key(NAMESPACE, f'version:{user_id}')
+
+
+def is_following(user, author_id):
+    """Подписан ли user на автора: флаг пары из кеша, при промахе — один
+    EXISTS по уникальному индексу подписок."""
+    if not user.is_authenticated:
+        return False
+    key = _pair_key(user.pk, author_id)
+    following = cache.get(key)
+    if following is None:
+        following = Follow.objects.filter(
+            user_id=user.pk, author_id=author_id
+        ).exists()
+        cache.set(key, following, TIMEOUT)
+    return following
+
+
+def followees_version(user_id):
+    """Метка подписок пользователя: меняется при подписке и отписке."""
+    return cache.get_or_set(
+        _version_key(user_id), lambda: uuid.uuid4().hex, TIMEOUT
+    )
+
+
+def forget(user_id, author_id):
+    """Сбросить флаг пары и метку подписок читателя."""
+    invalidate(_pair_key(user_id, author_id))
+    invalidate(_version_key(user_id))
+
+
+def forget_on_commit(user_id, author_id):
+    """Сбросить кеш пары сейчас и ещё раз после коммита.
+
+    Сейчас — чтобы своя транзакция видела новое значение, после
+    коммита — чтобы не осталось значения, которое другой запрос успел
+    прочитать из базы до коммита.
+    """
+    forget(user_id, author_id)
+    transaction.on_commit(lambda: forget(user_id, author_id))
+
+
+def invalidate_all():
+    invalidate(namespace=NAMESPACE)
+
+
+def follow(user, author):
+    """Подписать user на author, повтор ничего не делает.
+
+    Возвращает True, если подписка появилась. Гонку двух одинаковых
+    подписок решает уникальный индекс; post_save — только для новой
+    подписки, по нему обновляются счётчики, лента и кеш.
+    """
+    if user.pk == author.pk:
+        return False
+    return Follow.objects.get_or_create(
+        user_id=user.pk, author_id=author.pk
+    )[1]
+
+
+def unfollow(user, author):
+    """Отписать user от author, повтор ничего не делает.
+
+    Возвращает True, если подписка была.
+    """
+    deleted, _ = Follow.objects.filter(
+        user_id=user.pk, author_id=author.pk
+    ).delete()
+    return bool(deleted)
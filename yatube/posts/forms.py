@@ -1,8 +1,27 @@
 from django import forms
 from .models import Post, Comment
+from .uploads import canonical_image
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+        if self.upload_errors and self.files:
+            # Файл, отклонённый уже после чтения, поле не проверяет:
+            # ошибку загрузки выдаёт clean_image.
+            self.files = self.files.copy()
+            for name in self.upload_errors:
+                self.files.pop(name, None)
+
+    def clean_image(self):
+        if 'image' in self.upload_errors:
+            raise forms.ValidationError(self.upload_errors['image'])
+        image = self.cleaned_data.get('image')
+        if image and image != self.initial.get('image'):
+            image = canonical_image(image)
+        return image
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -0,0 +1,12 @@
+from core.cache.pages import hole
+
+from .follow import is_following
+
+
+@hole('posts/includes/follow_button.html')
+def follow_button(request, username, author_id):
+    """Кнопка подписки на странице профиля для вошедшего пользователя."""
+    return {
+        'author': {'username': username},
+        'following': is_following(request.user, int(author_id)),
+    }
@@ -0,0 +1,41 @@
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.urls import get_script_prefix, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+
+# Адреса карточек поста без reverse() на каждую ссылку. Адрес маршрута
+# один раз строится reverse() с меткой вместо параметра и делится по ней
+# на префикс и суффикс, дальше id и slug подставляются между ними.
+ROUTES = {
+    'post_detail': ('posts:post_detail', 9876543210),
+    'profile': ('posts:profile', 'urlmarker'),
+    'posts_group': ('posts:posts_group', 'urlmarker'),
+}
+# Символы, которые reverse() оставляет в параметре без экранирования.
+SAFE = RFC3986_SUBDELIMS + '/~:@'
+
+
+@lru_cache(maxsize=None)
+def route_parts(route, script_prefix):
+    """Префикс и суффикс адреса маршрута при данном SCRIPT_NAME."""
+    name, marker = ROUTES[route]
+    prefix, suffix = reverse(name, args=[marker]).split(str(marker))
+    return prefix, suffix
+
+
+def build(route, value):
+    prefix, suffix = route_parts(route, get_script_prefix())
+    return f'{prefix}{quote(str(value), safe=SAFE)}{suffix}'
+
+
+def post_url(post_id):
+    return build('post_detail', post_id)
+
+
+def profile_url(username):
+    return build('profile', username)
+
+
+def group_url(slug):
+    return build('posts_group', slug)
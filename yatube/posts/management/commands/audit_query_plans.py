@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.query_plans import audit
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для запросов страниц лент и падает, если '
+            'какой-то из них читает таблицу целиком или сортирует')
+
+    def handle(self, *args, **options):
+        found = audit()
+        for url, sql, lines in found:
+            self.stderr.write(f'{url}: {sql}')
+            for line in lines:
+                self.stderr.write(f'    {line}')
+        if found:
+            raise CommandError(f'Запросов с плохим планом: {len(found)}')
+        self.stdout.write(self.style.SUCCESS(
+            'Все запросы лент используют индексы'
+        ))
@@ -0,0 +1,154 @@
+import os
+import platform
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Меряет задержки и число запросов страниц posts на '
+            'синтетических данных во временной базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--comments', type=int, default=400)
+        parser.add_argument('--follows', type=int, default=60)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов к каждой странице')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Потоков клиента для WSGI-сервера')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--pages', nargs='+',
+                            choices=list(benchmark.TARGETS),
+                            default=list(benchmark.TARGETS))
+        parser.add_argument('--drivers', nargs='+',
+                            choices=['client', 'wsgi', 'mixed', 'templates'],
+                            default=['client', 'wsgi'],
+                            help='mixed — чтение и запись вперемешку, '
+                                 'templates — отрисовка лент Django и '
+                                 'Jinja2 с одним контекстом')
+        parser.add_argument('--write-share', type=float, default=0.25,
+                            help='Доля записей в нагрузке mixed')
+        parser.add_argument('--engine',
+                            help='Другой бэкенд базы, например '
+                                 'django.db.backends.sqlite3 для сравнения')
+        parser.add_argument('--save', metavar='PATH',
+                            help='Записать результаты в JSON')
+        parser.add_argument('--baseline', metavar='PATH',
+                            help='Сравнить с сохранённым JSON')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Допустимый рост p95 (доля)')
+
+    def handle(self, *args, **options):
+        if options['engine']:
+            # Соединения создаются заново уже с другим бэкендом.
+            connection.close()
+            connections.databases[DEFAULT_DB_ALIAS]['ENGINE'] = (
+                options['engine']
+            )
+            delattr(connections._connections, DEFAULT_DB_ALIAS)
+        # Данные живут во временной базе, рабочая не трогается. Для
+        # SQLite база файловая: её читают потоки WSGI-сервера.
+        directory = tempfile.TemporaryDirectory()
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory.name, 'benchmark.sqlite3'
+            )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(
+                DEBUG=False, ALLOWED_HOSTS=['testserver', '127.0.0.1']
+            ):
+                report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            directory.cleanup()
+        self.print_report(report)
+        if options['save']:
+            benchmark.save(report, options['save'])
+            self.stdout.write(f'Результаты записаны в {options["save"]}')
+        if options['baseline']:
+            regressions = benchmark.compare(
+                report, benchmark.load(options['baseline']),
+                options['tolerance']
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, options):
+        self.stdout.write('Заполнение базы...')
+        dataset = benchmark.seed(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], comments=options['comments'],
+            follows=options['follows'], random_seed=options['seed'],
+        )
+        results = {}
+        if 'client' in options['drivers']:
+            self.stdout.write('Тестовый клиент...')
+            results['client'] = benchmark.run_client(
+                dataset, options['pages'], options['requests'],
+                options['seed']
+            )
+        if 'wsgi' in options['drivers']:
+            self.stdout.write('WSGI-сервер...')
+            results['wsgi'] = benchmark.run_wsgi(
+                dataset, options['pages'], options['requests'],
+                options['concurrency'], options['seed']
+            )
+        if 'mixed' in options['drivers']:
+            self.stdout.write('Чтение и запись вперемешку...')
+            results['mixed'] = benchmark.run_mixed(
+                dataset, options['requests'], options['concurrency'],
+                options['write_share'], options['seed']
+            )
+        if 'templates' in options['drivers']:
+            self.stdout.write('Шаблоны Django и Jinja2...')
+            pages = [
+                name for name in options['pages']
+                if name in benchmark.TEMPLATE_PAGES
+            ]
+            engines = benchmark.run_templates(
+                dataset, pages, options['requests'],
+                random_seed=options['seed']
+            )
+            for alias, pages in engines.items():
+                results[f'templates_{alias}'] = pages
+        return {
+            'meta': {
+                'date': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'engine': connection.settings_dict['ENGINE'],
+                'dataset': dataset['size'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+            },
+            'results': results,
+        }
+
+    def print_report(self, report):
+        columns = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes',
+                   'errors', 'rps')
+        for driver, pages in report['results'].items():
+            self.stdout.write(f'\n{driver}')
+            self.stdout.write(
+                f'{"страница":<14}' + ''.join(f'{c:>10}' for c in columns)
+            )
+            for name, result in pages.items():
+                self.stdout.write(f'{name:<14}' + ''.join(
+                    f'{result.get(c, "-"):>10}' for c in columns
+                ))
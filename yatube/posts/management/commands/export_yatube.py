@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, пользователей, посты, комментарии и '
+            'подписки в NDJSON или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл выгрузки; «-» — стандартный вывод'
+        )
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or transfer.format_for(path)
+        start = time.perf_counter()
+        written = 0
+
+        def counted(records):
+            nonlocal written
+            for written, record in enumerate(records, start=1):
+                yield record
+
+        records = counted(transfer.export_records(options['batch_size']))
+        if path == '-':
+            transfer.WRITERS[data_format](records, sys.stdout)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                transfer.WRITERS[data_format](records, file)
+        seconds = time.perf_counter() - start
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {written} за {seconds:.1f} с '
+            f'({written / max(seconds, 1e-9):.0f} записей/с)'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит превью для картинок постов, у которых их ещё нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перестроить превью даже если они уже есть'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['force']:
+            posts = posts.filter(thumbnails_ready=False)
+        built = 0
+        for post_id, image_name in posts.values_list(
+            'id', 'image'
+        ).iterator():
+            thumbnails.generate(post_id, image_name)
+            built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Превью построены для постов: {built}'
+        ))
@@ -0,0 +1,83 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает NDJSON или CSV из export_yatube пачками через '
+            'bulk_create, продолжая с контрольной точки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки')
+        parser.add_argument('--format', choices=transfer.FORMATS)
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE,
+            help='Записей в одной транзакции bulk_create'
+        )
+        parser.add_argument(
+            '--checkpoint', metavar='PATH',
+            help='Файл контрольной точки (по умолчанию PATH.checkpoint)'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на контрольную точку'
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поиск после загрузки'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or transfer.format_for(path)
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        skip = 0 if options['restart'] else transfer.read_checkpoint(
+            checkpoint
+        )
+        if skip:
+            self.stdout.write(f'Продолжаю после записи {skip}')
+        importer = transfer.Importer(options['batch_size'])
+        start = time.perf_counter()
+
+        def on_batch(done):
+            transfer.write_checkpoint(checkpoint, done)
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'{done} записей, {self.rate(done - skip, start):.0f} '
+                    f'записей/с'
+                )
+
+        with open(path, encoding='utf-8', newline='') as file:
+            try:
+                done = importer.run(
+                    transfer.READERS[data_format](file), skip, on_batch
+                )
+            except transfer.TransferError as error:
+                raise CommandError(
+                    f'{error}. Загрузка остановлена, контрольная точка: '
+                    f'{transfer.read_checkpoint(checkpoint)}'
+                )
+        loaded = done - skip
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {loaded} '
+            f'({self.rate(loaded, start):.0f} записей/с): '
+            + ', '.join(
+                f'{kind} {importer.counts[kind]}' for kind in transfer.KINDS
+            )
+        ))
+        if importer.missing_images:
+            self.stdout.write(self.style.WARNING(
+                f'Нет файлов картинок в хранилище: {importer.missing_images}'
+            ))
+        if not options['no_rebuild']:
+            transfer.rebuild_derived()
+            self.stdout.write('Счётчики, ленты и поисковый индекс пересобраны')
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    @staticmethod
+    def rate(records, start):
+        return records / max(time.perf_counter() - start, 1e-9)
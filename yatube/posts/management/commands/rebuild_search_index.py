@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс постов и комментариев'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            documents = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс построен, документов: {documents}'
+        ))
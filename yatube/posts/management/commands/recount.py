@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок'
+
+    def handle(self, *args, **options):
+        fixed = recount()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны, исправлено строк: {fixed}'
+        ))
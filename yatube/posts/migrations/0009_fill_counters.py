@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+
+    def totals(queryset, field):
+        return dict(
+            queryset.values_list(field).annotate(total=Count('pk'))
+            .order_by()
+        )
+
+    posts = totals(Post.objects, 'author')
+    comments = totals(Comment.objects, 'author')
+    followers = totals(Follow.objects, 'author')
+    following = totals(Follow.objects, 'user')
+    AuthorStats.objects.bulk_create([
+        AuthorStats(
+            user_id=pk,
+            post_count=posts.get(pk, 0),
+            comment_count=comments.get(pk, 0),
+            follower_count=followers.get(pk, 0),
+            following_count=following.get(pk, 0),
+        )
+        for pk in User.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+    for group_id, total in totals(Post.objects, 'group').items():
+        if group_id is not None:
+            Group.objects.filter(pk=group_id).update(post_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
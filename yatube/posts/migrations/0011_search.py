@@ -0,0 +1,101 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:49
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import OperationalError, migrations, models, transaction
+import django.db.models.deletion
+
+# Копия posts.search на момент миграции: миграция не зависит от того,
+# как модуль поиска изменится потом.
+FTS_TABLE = 'posts_search'
+WEIGHTS = {'post': 2, 'comment': 1}
+TOKEN_LENGTH = 64
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [token[:TOKEN_LENGTH] for token in TOKEN_RE.findall(text)]
+
+
+def create_fts_table(schema_editor):
+    """Таблица FTS5, если SQLite её поддерживает; True, если создана."""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                'body, kind UNINDEXED, post_id UNINDEXED, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+    except OperationalError:
+        return False
+    return True
+
+
+def create_index(apps, schema_editor):
+    if create_fts_table(schema_editor):
+        # rowid: посты — чётные, комментарии — нечётные.
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, body, kind, post_id) '
+            "SELECT id * 2, text, 'post', id FROM posts_post"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, body, kind, post_id) '
+            "SELECT id * 2 + 1, text, 'comment', post_id FROM posts_comment"
+        )
+        return
+    alias = schema_editor.connection.alias
+    SearchToken = apps.get_model('posts', 'SearchToken')
+    documents = (
+        ('post', apps.get_model('posts', 'Post'), 'id'),
+        ('comment', apps.get_model('posts', 'Comment'), 'post_id'),
+    )
+    for kind, model, post_field in documents:
+        for object_id, post_id, text in model.objects.using(alias).values_list(
+            'id', post_field, 'text'
+        ).iterator():
+            SearchToken.objects.using(alias).bulk_create([
+                SearchToken(token=token, kind=kind, object_id=object_id,
+                            post_id=post_id, weight=count * WEIGHTS[kind])
+                for token, count in Counter(tokenize(text)).items()
+            ])
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, verbose_name='Слово')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=7, verbose_name='Документ')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Номер документа')),
+                ('weight', models.PositiveSmallIntegerField(verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['token', 'kind'], name='posts_search_token_kind'),
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['kind', 'object_id'], name='posts_search_document'),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+# posts.timeline.FANOUT_FOLLOWERS_LIMIT на момент миграции.
+FANOUT_FOLLOWERS_LIMIT = 1000
+
+
+def mark_popular(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    popular = AuthorStats.objects.filter(
+        follower_count__gt=FANOUT_FOLLOWERS_LIMIT
+    )
+    popular.update(popular=True)
+    TimelineEntry.objects.filter(
+        post__author_id__in=popular.values('user_id')
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='popular',
+            field=models.BooleanField(default=False, verbose_name='Популярный'),
+        ),
+        migrations.RunPython(mark_popular, migrations.RunPython.noop),
+    ]
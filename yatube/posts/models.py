@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 
 from core.models import CreateModel
+from . import links
 
 User = get_user_model()
 
@@ -21,16 +22,40 @@ class Group(models.Model):
         "описание",
         help_text="напишите краткое описание группы"
     )
+    post_count = models.PositiveIntegerField(
+        "количество постов",
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return links.group_url(self.slug)
+
     class Meta:
         verbose_name = "Группы"
         verbose_name_plural = "Группы"
         ordering = ['title']
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для ленты: автор и группа одним JOIN, без лишних колонок.
+
+        Поле image остаётся строкой с именем файла, хранилище и Pillow
+        при выборке не трогаются.
+        """
+        return self.select_related('author', 'group').only(
+            'id', 'created', 'updated', 'text', 'image', 'thumbnails_ready',
+            'comment_id',
+            'author__id', 'author__username',
+            'author__first_name', 'author__last_name',
+            'group__id', 'group__slug', 'group__title',
+        )
+
+
 class Post(CreateModel):
     text = models.TextField(
         "Текст поста",
@@ -61,14 +86,65 @@ class Post(CreateModel):
         upload_to='posts/',
         blank=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+    comment_count = models.PositiveIntegerField(
+        'количество комментариев',
+        default=0,
+        editable=False
+    )
+    # Превью картинки построены (posts/thumbnails.py); сбрасывается
+    # при смене картинки.
+    thumbnails_ready = models.BooleanField(
+        'превью построены',
+        default=False,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def cache_version(self):
+        """Версия кеша карточки: меняется при каждом сохранении поста."""
+        return int(self.updated.timestamp() * 1000000)
+
+    # Ссылки карточки поста без reverse(), см. posts/links.py.
+    def get_absolute_url(self):
+        return links.post_url(self.pk)
+
+    @property
+    def author_url(self):
+        return links.profile_url(self.author.username)
+
+    @property
+    def group_url(self):
+        return links.group_url(self.group.slug) if self.group_id else None
+
     class Meta:
         ordering = ['-created']
         verbose_name = "Посты"
         verbose_name_plural = "Посты"
+        # Индексы под курсорную выдачу лент: (created, id) по убыванию,
+        # отдельно для общей ленты, автора и группы.
+        indexes = [
+            models.Index(fields=['-created', '-id'],
+                         name='posts_post_created'),
+            models.Index(fields=['author', '-created', '-id'],
+                         name='posts_post_author_created'),
+            models.Index(fields=['group', '-created', '-id'],
+                         name='posts_post_group_created'),
+            # Последнее изменение ленты для ETag и Last-Modified.
+            models.Index(fields=['updated'], name='posts_post_updated'),
+            models.Index(fields=['author', 'updated'],
+                         name='posts_post_author_updated'),
+            models.Index(fields=['group', 'updated'],
+                         name='posts_post_group_updated'),
+        ]
 
 
 class Comment(CreateModel):
@@ -96,7 +172,11 @@ class Comment(CreateModel):
     class Meta:
         verbose_name = "Комментарии"
         verbose_name_plural = "Комментарии"
-        ordering = ['text']
+        ordering = ['created']
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='posts_comment_post_created'),
+        ]
 
 
 class Follow(models.Model):
@@ -110,3 +190,85 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='posts_follow_unique'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Строка материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        ordering = ['-created']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created', '-post'],
+                         name='posts_timeline_user_created'),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики пользователя, обновляются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+    follower_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    # Посты автора не раскладываются по лентам, а читаются из Post
+    # (posts/timeline.py).
+    popular = models.BooleanField('Популярный', default=False)
+
+    def __str__(self):
+        return f'Счётчики {self.user_id}'
+
+    class Meta:
+        verbose_name = "Счётчики автора"
+        verbose_name_plural = "Счётчики авторов"
+
+
+class SearchToken(models.Model):
+    """Строка инвертированного индекса поиска (posts/search.py).
+
+    Используется, когда в базе нет FTS5: слово текста поста или
+    комментария и его вес в документе.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    token = models.CharField('Слово', max_length=64)
+    kind = models.CharField('Документ', max_length=7, choices=KINDS)
+    object_id = models.PositiveIntegerField('Номер документа')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    weight = models.PositiveSmallIntegerField('Вес')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'kind'],
+                         name='posts_search_token_kind'),
+            models.Index(fields=['kind', 'object_id'],
+                         name='posts_search_document'),
+        ]
@@ -0,0 +1,75 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.explain import explain, problems
+from core.paginator import CursorPaginator
+from .models import Follow, Group, Post
+from .timeline import TimelinePaginator
+
+
+def _cursor(paginator):
+    """Курсор второй страницы ленты, чтобы проверить и запросы с seek."""
+    paginator.page(None)
+    return paginator.next_cursor
+
+
+def feed_pages():
+    """Страницы лент и постов, запросы которых проверяет аудит.
+
+    Возвращает пользователя, от имени которого смотрятся страницы, и
+    список пар (адрес, GET-параметры).
+    """
+    follow = Follow.objects.select_related('user', 'author').first()
+    post = Post.objects.order_by('-id').first()
+    if post is None:
+        return None, []
+    user = follow.user if follow else post.author
+    author = follow.author if follow else post.author
+    group = Group.objects.filter(post_count__gt=0).first()
+    feeds = [
+        (reverse('posts:posts_index'),
+         CursorPaginator(Post.objects.all(), 1)),
+        (reverse('posts:profile', args=[author.username]),
+         CursorPaginator(author.posts.all(), 1)),
+        (reverse('posts:follow_index'), TimelinePaginator(user, 1)),
+    ]
+    if group is not None:
+        feeds.append((reverse('posts:posts_group', args=[group.slug]),
+                      CursorPaginator(group.posts.all(), 1)))
+    pages = [(reverse('posts:post_detail', args=[post.id]), None)]
+    for url, paginator in feeds:
+        pages.append((url, None))
+        cursor = _cursor(paginator)
+        if cursor:
+            pages.append((url, {'cursor': cursor}))
+    return user, pages
+
+
+def audit(using=DEFAULT_DB_ALIAS):
+    """Выполнить EXPLAIN для каждого SELECT на страницах лент.
+
+    Возвращает список (адрес, запрос, проблемные строки плана) только для
+    запросов с полным проходом по таблице или сортировкой. Всё, что
+    страницы пишут в базу (сессия входа), откатывается.
+    """
+    connection = connections[using]
+    found = []
+    with transaction.atomic(using=using):
+        user, pages = feed_pages()
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        for url, params in pages:
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url, params)
+            for query in queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                bad = problems(explain(sql, using), using)
+                if bad:
+                    found.append((url, sql, bad))
+        transaction.set_rollback(True, using=using)
+    return found
@@ -0,0 +1,228 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, Sum
+
+from .models import Comment, Post, SearchToken
+
+# Полнотекстовый поиск по постам и комментариям. Документ индекса —
+# текст одного поста или одного комментария. В SQLite со сборкой FTS5
+# индекс живёт в виртуальной таблице FTS_TABLE (её создаёт миграция
+# 0011_search), иначе — в таблице слов SearchToken. Выдача — номера
+# постов по убыванию релевантности.
+FTS_TABLE = 'posts_search'
+POST, COMMENT = SearchToken.POST, SearchToken.COMMENT
+# Совпадение в комментарии весит вдвое меньше совпадения в посте.
+WEIGHTS = {POST: 2, COMMENT: 1}
+# Сколько лучших результатов отдаёт поиск.
+SEARCH_LIMIT = 500
+MAX_TERMS = 8
+TOKEN_LENGTH = 64
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+_fts_tables = {}
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре без диакритики (ё -> е).
+
+    Совпадает с токенизатором FTS5 unicode61 remove_diacritics 2.
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [token[:TOKEN_LENGTH] for token in TOKEN_RE.findall(text)]
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+
+
+def has_fts_table(connection):
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _fts_tables:
+        _fts_tables[key] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[key]
+
+
+class FTS5Index:
+    """Индекс в виртуальной таблице FTS5, ранжирование по bm25."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def rowid(kind, object_id):
+        # Посты и комментарии делят rowid: чётные — посты.
+        return object_id * 2 + (kind == COMMENT)
+
+    def update(self, kind, object_id, post_id, text):
+        rowid = self.rowid(kind, object_id)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body, kind, post_id) '
+                'VALUES (%s, %s, %s, %s)',
+                [rowid, text, kind, post_id]
+            )
+
+    def remove(self, kind, object_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [self.rowid(kind, object_id)]
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    @staticmethod
+    def match(terms):
+        return ' '.join('"{}"'.format(term) for term in terms)
+
+    def search(self, terms, limit):
+        # LIMIT -1 не даёт SQLite развернуть подзапрос в GROUP BY:
+        # bm25() работает только в запросе с MATCH.
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT post_id, SUM(score) AS total FROM ('
+                f'  SELECT post_id, -bm25({FTS_TABLE}) * CASE kind'
+                f"   WHEN '{COMMENT}' THEN %s ELSE %s END AS score"
+                f'  FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT -1'
+                ') GROUP BY post_id ORDER BY total DESC, post_id DESC '
+                'LIMIT %s',
+                [WEIGHTS[COMMENT], WEIGHTS[POST], self.match(terms), limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def documents(self, kind, terms, limit):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND kind = %s '
+                'ORDER BY rank LIMIT %s',
+                [self.match(terms), kind, limit]
+            )
+            return [row[0] // 2 for row in cursor.fetchall()]
+
+
+class TokenIndex:
+    """Переносимый индекс: таблица слов с весами для любой базы."""
+
+    def __init__(self, connection, model=SearchToken):
+        self.connection = connection
+        self.model = model
+
+    @property
+    def tokens(self):
+        return self.model.objects.using(self.connection.alias)
+
+    def update(self, kind, object_id, post_id, text):
+        self.remove(kind, object_id)
+        self.tokens.bulk_create([
+            self.model(token=token, kind=kind, object_id=object_id,
+                       post_id=post_id, weight=count * WEIGHTS[kind])
+            for token, count in Counter(tokenize(text)).items()
+        ])
+
+    def remove(self, kind, object_id):
+        self.tokens.filter(kind=kind, object_id=object_id).delete()
+
+    def clear(self):
+        self.tokens.all().delete()
+
+    def matches(self, terms):
+        """Документы, в которых встречаются все слова запроса."""
+        return self.tokens.filter(token__in=terms).order_by().values(
+            'kind', 'object_id', 'post_id'
+        ).annotate(
+            matched=Count('token', distinct=True), score=Sum('weight')
+        ).filter(matched=len(terms))
+
+    def search(self, terms, limit):
+        scores = defaultdict(int)
+        for row in self.matches(terms).iterator():
+            scores[row['post_id']] += row['score']
+        ranked = sorted(
+            scores.items(), key=lambda item: (item[1], item[0]),
+            reverse=True
+        )
+        return [post_id for post_id, score in ranked[:limit]]
+
+    def documents(self, kind, terms, limit):
+        return list(self.matches(terms).filter(kind=kind).order_by(
+            '-score', '-object_id'
+        ).values_list('object_id', flat=True)[:limit])
+
+
+def backend(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if has_fts_table(connection):
+        return FTS5Index(connection)
+    return TokenIndex(connection)
+
+
+def index_post(post):
+    backend().update(POST, post.pk, post.pk, post.text)
+
+
+def index_comment(comment):
+    backend().update(COMMENT, comment.pk, comment.post_id, comment.text)
+
+
+def remove_post(post_id):
+    backend().remove(POST, post_id)
+
+
+def remove_comment(comment_id):
+    backend().remove(COMMENT, comment_id)
+
+
+def search_posts(query, limit=SEARCH_LIMIT):
+    """Номера постов, подходящих под запрос, от лучших к худшим."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    return backend().search(terms, limit)
+
+
+def search_documents(kind, query, limit=SEARCH_LIMIT):
+    """Номера постов или комментариев, в тексте которых есть все слова."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    return backend().documents(kind, terms, limit)
+
+
+def fill(index, posts, comments):
+    """Проиндексировать все посты и комментарии заново.
+
+    posts и comments — менеджеры моделей, так что функция годится и для
+    миграции с историческими моделями. Возвращает число документов.
+    """
+    index.clear()
+    documents = 0
+    for post_id, text in posts.values_list('id', 'text').iterator():
+        index.update(POST, post_id, post_id, text)
+        documents += 1
+    for comment_id, post_id, text in comments.values_list(
+        'id', 'post_id', 'text'
+    ).iterator():
+        index.update(COMMENT, comment_id, post_id, text)
+        documents += 1
+    return documents
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    return fill(
+        backend(using), Post.objects.using(using),
+        Comment.objects.using(using)
+    )
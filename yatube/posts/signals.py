@@ -0,0 +1,207 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from core.cache.pages import invalidate_pages
+
+from . import (
+    cards, conditional, counters, follow, links, search, thumbnails,
+    timeline,
+)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые выводятся в карточках и на страницах.
+USER_DISPLAY_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=User)
+def user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=User)
+def user_remember_saved(sender, instance, raw=False, update_fields=None,
+                        **kwargs):
+    instance._display_changed = not raw
+    if update_fields is not None:
+        # save(update_fields=...), например last_login при входе, —
+        # без запроса к базе.
+        instance._display_changed = bool(
+            set(update_fields).intersection(USER_DISPLAY_FIELDS)
+        )
+    elif instance.pk and not raw:
+        saved = User.objects.filter(pk=instance.pk).values_list(
+            *USER_DISPLAY_FIELDS
+        ).first()
+        instance._display_changed = saved != tuple(
+            getattr(instance, field) for field in USER_DISPLAY_FIELDS
+        )
+
+
+@receiver(post_save, sender=User)
+def user_display_changed(sender, instance, created, raw=False, **kwargs):
+    # Остальные сохранения пользователя (last_login при каждом входе,
+    # пароль) страниц не меняют и кеш не сбрасывают.
+    if not created and not raw and instance._display_changed:
+        cards.touch(Post.objects.filter(author_id=instance.pk))
+        invalidate_pages()
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_saved(sender, instance, raw=False, **kwargs):
+    instance._saved_group_id = instance._saved_version = None
+    instance._saved_image = None
+    if instance.pk and not raw:
+        saved = Post.objects.filter(pk=instance.pk).first()
+        if saved is not None:
+            instance._saved_group_id = saved.group_id
+            instance._saved_version = saved.cache_version
+            instance._saved_image = saved.image.name
+            # Превью могли достроиться, пока пост редактировали.
+            instance.thumbnails_ready = saved.thumbnails_ready
+    if not raw and instance.image.name != instance._saved_image:
+        # Новая картинка: превью старой не подходят.
+        instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Post)
+def post_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_author(instance.author_id, 'post_count', 1)
+        counters.change_group(instance.group_id, 1)
+    elif instance._saved_group_id != instance.group_id:
+        counters.change_group(instance._saved_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def post_card_invalidate(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw and instance._saved_version is not None:
+        cards.invalidate(instance.pk, instance._saved_version)
+
+
+@receiver(post_save, sender=Post)
+def post_thumbnails(sender, instance, created, raw=False, **kwargs):
+    if not raw and instance.image.name != instance._saved_image:
+        thumbnails.enqueue(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_search_remove(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_delete_counters(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, 'post_count', -1)
+    counters.change_group(instance.group_id, -1)
+    cards.invalidate(instance.pk, instance.cache_version)
+
+
+@receiver(post_delete, sender=Post)
+def post_conditional_deleted(sender, instance, **kwargs):
+    conditional.mark_deleted()
+
+
+@receiver(post_save, sender=Comment)
+def comment_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_author(instance.author_id, 'comment_count', 1)
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_delete_counters(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, 'comment_count', -1)
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_search_remove(sender, instance, **kwargs):
+    search.remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_card_invalidate(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    post = Post.objects.filter(pk=instance.post_id).only('updated').first()
+    if post is not None:
+        cards.invalidate(post.pk, post.cache_version)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_cards_touch(sender, instance, raw=False, **kwargs):
+    if not raw and not kwargs.get('created'):
+        cards.touch(Post.objects.filter(group_id=instance.pk))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def pages_invalidate(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages()
+
+
+@receiver(post_save, sender=Follow)
+def follow_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_author(instance.user_id, 'following_count', 1)
+        counters.change_author(instance.author_id, 'follower_count', 1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_delete_counters(sender, instance, **kwargs):
+    counters.change_author(instance.user_id, 'following_count', -1)
+    counters.change_author(instance.author_id, 'follower_count', -1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_cleanup(sender, instance, **kwargs):
+    timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_graph(sender, instance, raw=False, **kwargs):
+    if not raw:
+        follow.forget_on_commit(instance.user_id, instance.author_id)
+
+
+@receiver(setting_changed)
+def links_reset(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        links.route_parts.cache_clear()
@@ -0,0 +1,11 @@
+from django import template
+
+from ..thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """URL заранее построенного превью, без обращения к Pillow."""
+    return thumbnail_url(post, size)
@@ -0,0 +1,120 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author if i % 2 else cls.other,
+                group=cls.group if i % 3 else None,
+                text=f'Пост {i}',
+            )
+            for i in range(7)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, url, data=None, client=None):
+        response = (client or self.guest_client).get(url, data)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(b''.join(response.streaming_content))
+
+    def walk(self, url, data, client=None):
+        """Все посты ленты по курсорам next."""
+        results, cursor = [], None
+        while True:
+            response, page = self.get(
+                url, dict(data, cursor=cursor or ''), client
+            )
+            results += page['results']
+            cursor = page['next']
+            if cursor is None:
+                return results
+
+    def test_posts_pages(self):
+        """Курсорная выдача отдаёт все посты по порядку"""
+        results = self.walk(reverse('posts:api_posts'), {'limit': 3})
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.id for post in reversed(self.posts)]
+        )
+        self.assertEqual(set(results[0]), set(
+            ['id', 'text', 'created', 'updated', 'author', 'group', 'image']
+        ))
+        self.assertEqual(results[0]['author'], self.posts[-1].author.username)
+
+    def test_sparse_fields(self):
+        response, page = self.get(
+            reverse('posts:api_posts'), {'fields': 'id,author'}
+        )
+        self.assertEqual(set(page['results'][0]), {'id', 'author'})
+
+    def test_group_posts(self):
+        results = self.walk(
+            reverse('posts:api_group_posts', args=[self.group.slug]),
+            {'limit': 2, 'fields': 'id,group'}
+        )
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.id for post in reversed(self.posts) if post.group_id]
+        )
+        self.assertEqual({post['group'] for post in results}, {'group'})
+
+    def test_bulk_lookup(self):
+        """?ids= отдаёт только посты этой ленты"""
+        ids = [self.posts[0].id, self.posts[1].id]
+        response, page = self.get(
+            reverse('posts:api_follow'),
+            {'ids': ','.join(map(str, ids)), 'fields': 'id'},
+            self.reader_client,
+        )
+        self.assertEqual(page['results'], [{'id': self.posts[1].id}])
+
+    def test_follow_feed(self):
+        results = self.walk(
+            reverse('posts:api_follow'), {'limit': 2, 'fields': 'id'},
+            self.reader_client,
+        )
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.id for post in reversed(self.posts)
+             if post.author == self.author]
+        )
+
+    def test_errors(self):
+        cases = (
+            (self.guest_client, reverse('posts:api_follow'), {}, 403),
+            (self.guest_client, reverse('posts:api_group_posts',
+                                        args=['missing']), {}, 404),
+            (self.guest_client, reverse('posts:api_posts'),
+             {'fields': 'id,password'}, 400),
+            (self.guest_client, reverse('posts:api_posts'),
+             {'ids': '1,x'}, 400),
+            (self.guest_client, reverse('posts:api_posts'),
+             {'limit': '1000'}, 400),
+        )
+        for client, url, data, status in cases:
+            with self.subTest(url=url, data=data):
+                response = client.get(url, data)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+        response = self.guest_client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,93 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .. import benchmark
+from ..models import Comment, Follow, Post
+
+SMALL = {'users': 4, 'groups': 2, 'posts': 12, 'comments': 6, 'follows': 3}
+
+
+class BenchmarkStatsTest(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 95), 95)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 99), 7)
+        self.assertIsNone(benchmark.percentile([], 50))
+
+    def report(self, p95, queries):
+        return {'results': {'client': {'index': {
+            'p95_ms': p95, 'queries': queries
+        }}}}
+
+    def test_compare(self):
+        baseline = self.report(10.0, 3)
+        self.assertEqual(
+            benchmark.compare(self.report(11.5, 3), baseline), []
+        )
+        self.assertEqual(
+            len(benchmark.compare(self.report(13.0, 4), baseline)), 2
+        )
+        # Небольшой абсолютный рост не считается регрессией.
+        self.assertEqual(
+            benchmark.compare(self.report(0.9, 3), self.report(0.5, 3)), []
+        )
+
+
+class BenchmarkClientTest(TestCase):
+    def test_seed_and_client_run(self):
+        dataset = benchmark.seed(**SMALL)
+        self.assertEqual(Post.objects.count(), SMALL['posts'])
+        self.assertEqual(Comment.objects.count(), SMALL['comments'])
+        self.assertEqual(
+            Follow.objects.count(), SMALL['users'] - 1 + SMALL['follows']
+        )
+        results = benchmark.run_client(dataset, list(benchmark.TARGETS), 3)
+        self.assertEqual(set(results), set(benchmark.TARGETS))
+        for name, result in results.items():
+            with self.subTest(page=name):
+                self.assertEqual(result['requests'], 3)
+                self.assertEqual(result['errors'], 0)
+                self.assertGreater(result['queries'], 0)
+        self.assertGreater(results['index']['bytes'], 0)
+        self.assertEqual(Comment.objects.count(), SMALL['comments'] + 3)
+
+    def test_templates_run(self):
+        dataset = benchmark.seed(**SMALL)
+        results = benchmark.run_templates(
+            dataset, list(benchmark.TEMPLATE_PAGES), 2
+        )
+        self.assertEqual(set(results), set(benchmark.TEMPLATE_ENGINES))
+        for pages in results.values():
+            self.assertEqual(set(pages), set(benchmark.TEMPLATE_PAGES))
+            self.assertGreater(pages['index']['bytes'], 0)
+
+
+@override_settings(ALLOWED_HOSTS=['127.0.0.1'])
+class BenchmarkWSGITest(TransactionTestCase):
+    def test_wsgi_run(self):
+        dataset = benchmark.seed(**SMALL)
+        results = benchmark.run_wsgi(
+            dataset, ['index', 'follow_index'], 4, concurrency=2
+        )
+        for result in results.values():
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['bytes'], 0)
+            self.assertNotIn('queries', result)
+
+    def test_mixed_run(self):
+        dataset = benchmark.seed(**SMALL)
+        # Тестовая база в памяти с общим кешем не пускает читателей во
+        # время записи, поэтому здесь один поток; параллельная запись
+        # проверяется в core.tests.test_db на файловой базе.
+        results = benchmark.run_mixed(
+            dataset, 12, concurrency=1, write_share=0.5
+        )
+        self.assertEqual(set(results), {'read', 'write'})
+        for result in results.values():
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['rps'], 0)
+        self.assertEqual(
+            Comment.objects.count(),
+            SMALL['comments'] + results['write']['requests']
+        )
@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def urls(self):
+        return [
+            reverse('posts:posts_index'),
+            reverse('posts:posts_group', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        ]
+
+    def test_not_modified(self):
+        """Повторный запрос с валидаторами получает 304 без рендера"""
+        for url in self.urls():
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                self.assertTrue(first.has_header('Last-Modified'))
+                with self.assertTemplateNotUsed('base.html'):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """Новый пост, комментарий или удаление меняют ETag"""
+        url = reverse('posts:post_detail', args=[self.post.id])
+        tags = {self.guest_client.get(url)['ETag']}
+        comments = [
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'
+            )
+            for _ in range(2)
+        ]
+        tags.add(self.guest_client.get(url)['ETag'])
+        comments[0].delete()
+        tags.add(self.guest_client.get(url)['ETag'])
+        self.assertEqual(len(tags), 3)
+
+        url = reverse('posts:posts_index')
+        tags = {self.guest_client.get(url)['ETag']}
+        post = Post.objects.create(author=self.reader, text='Новый пост')
+        tags.add(self.guest_client.get(url)['ETag'])
+        post.delete()
+        tags.add(self.guest_client.get(url)['ETag'])
+        self.assertEqual(len(tags), 3)
+
+    def test_author_and_group_change_etag(self):
+        """Имя автора и название группы из карточек меняют ETag"""
+        url = reverse('posts:posts_index')
+        tags = {self.guest_client.get(url)['ETag']}
+        self.author.first_name = 'Лев'
+        self.author.save()
+        tags.add(self.guest_client.get(url)['ETag'])
+        self.group.title = 'Другая группа'
+        self.group.save()
+        tags.add(self.guest_client.get(url)['ETag'])
+        self.assertEqual(len(tags), 3)
+        # Вход сохраняет только last_login и посты автора не трогает.
+        updated = Post.objects.get(pk=self.post.pk).updated
+        Client().force_login(self.author)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated, updated)
+
+    def test_per_user_validators(self):
+        """У пользователя свой ETag с учётом подписки и нет Last-Modified"""
+        url = reverse('posts:profile', args=[self.author.username])
+        guest = self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertNotEqual(response['ETag'], guest['ETag'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        followed = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(followed.status_code, 200)
+        self.assertTrue(followed.context['following'])
+
+    def test_missing_page(self):
+        response = self.guest_client.get(
+            reverse('posts:posts_group', args=['missing'])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
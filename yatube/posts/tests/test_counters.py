@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
+
+GROUP_TITLE = 'Тестовый заголовок'
+GROUP_SLUG = 'test_slug'
+GROUP_DESCRIPTION = 'Тестовое описание'
+POST_TEXT = 'Тестовый текст'
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION
+        )
+        cls.other_group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug='other_slug',
+            description=GROUP_DESCRIPTION
+        )
+        cls.guest_client = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cache.clear()
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Счётчики постов автора и группы следуют за созданием,
+        сменой группы и удалением поста"""
+        post = Post.objects.create(text=POST_TEXT, author=self.user,
+                                   group=self.group)
+        self.assertEqual(self.stats(self.user).post_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 1)
+
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+        self.assertEqual(self.other_group.post_count, 1)
+
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.stats(self.user).post_count, 0)
+        self.assertEqual(self.other_group.post_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        post = Post.objects.create(text=POST_TEXT, author=self.user)
+        Comment.objects.create(post=post, author=self.reader, text=POST_TEXT)
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(self.stats(self.reader).comment_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(self.stats(self.user).follower_count, 1)
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).comment_count, 1
+        )
+        follow.delete()
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertEqual(self.stats(self.user).follower_count, 0)
+
+    def test_profile_does_not_count_posts(self):
+        """Страница профиля берёт число постов из счётчика"""
+        Post.objects.create(text=POST_TEXT, author=self.user)
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.context['num_of_posts'], 1)
+        # Запрос валидаторов условного GET, профиль и лента.
+        self.assertEqual(len(queries), 3)
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_recount_command(self):
+        """Команда recount исправляет разошедшиеся счётчики"""
+        Post.objects.bulk_create([
+            Post(text=POST_TEXT, author=self.user, group=self.group)
+            for i in range(3)
+        ])
+        AuthorStats.objects.filter(user=self.reader).delete()
+        post = Post.objects.create(text=POST_TEXT, author=self.user)
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.user, text=POST_TEXT)
+        ])
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.user).post_count, 4)
+        self.assertEqual(self.group.post_count, 3)
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 1)
+        self.assertTrue(AuthorStats.objects.filter(user=self.reader))
+        self.assertIn('3', out.getvalue())
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follow
+from ..models import Follow, Post, TimelineEntry, User
+
+
+class FollowServiceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_is_idempotent(self):
+        self.assertTrue(follow.follow(self.user, self.author))
+        self.assertFalse(follow.follow(self.user, self.author))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            User.objects.get(pk=self.author.pk).stats.follower_count, 1
+        )
+        self.assertEqual(
+            User.objects.get(pk=self.user.pk).stats.following_count, 1
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=self.post
+        ).exists())
+
+    def test_self_follow(self):
+        self.assertFalse(follow.follow(self.author, self.author))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_unfollow_only_own_follow(self):
+        """Отписка удаляет подписку только этого пользователя"""
+        follow.follow(self.user, self.author)
+        follow.follow(self.other, self.author)
+        self.assertTrue(follow.unfollow(self.user, self.author))
+        self.assertFalse(follow.unfollow(self.user, self.author))
+        self.assertEqual(
+            list(Follow.objects.values_list('user_id', flat=True)),
+            [self.other.pk]
+        )
+        self.assertEqual(
+            User.objects.get(pk=self.author.pk).stats.follower_count, 1
+        )
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user
+        ).exists())
+
+    def test_cached_pairs(self):
+        follow.follow(self.user, self.author)
+        with self.assertNumQueries(1):
+            self.assertTrue(follow.is_following(self.user, self.author.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(follow.is_following(self.user, self.author.pk))
+        version = follow.followees_version(self.user.pk)
+        follow.unfollow(self.user, self.author)
+        self.assertFalse(follow.is_following(self.user, self.author.pk))
+        self.assertNotEqual(follow.followees_version(self.user.pk), version)
+
+    def test_cache_reset_after_commit(self):
+        """Значение, прочитанное до коммита подписки, сбрасывается после"""
+        with mock.patch('django.db.transaction.on_commit') as on_commit:
+            follow.follow(self.user, self.author)
+        self.assertTrue(follow.is_following(self.user, self.author.pk))
+        cache.set(follow._pair_key(self.user.pk, self.author.pk), False)
+        on_commit.call_args[0][0]()
+        self.assertTrue(follow.is_following(self.user, self.author.pk))
+
+    def test_follow_through_model_resets_cache(self):
+        """Подписки из админки и shell тоже сбрасывают кеш"""
+        self.assertFalse(follow.is_following(self.user, self.author.pk))
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(follow.is_following(self.user, self.author.pk))
+
+    def test_anonymous(self):
+        anonymous = AnonymousUser()
+        self.assertFalse(follow.is_following(anonymous, self.author.pk))
+
+    def test_unfollow_view_with_several_followers(self):
+        follow.follow(self.user, self.author)
+        follow.follow(self.other, self.author)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertFalse(follow.is_following(self.user, self.author.pk))
+        self.assertTrue(follow.is_following(self.other, self.author.pk))
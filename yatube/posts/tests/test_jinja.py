@@ -0,0 +1,105 @@
+import random
+import re
+
+from django import forms
+from django.core.cache import cache
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import benchmark
+from ..models import Post, User
+
+JINJA_FEEDS = {
+    'posts:posts_index': 'jinja2',
+    'posts:posts_group': 'jinja2',
+    'posts:profile': 'jinja2',
+    'posts:follow_index': 'jinja2',
+}
+
+
+def normalize(html):
+    """Разметка без разницы в пробелах между движками."""
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+class JinjaTemplatesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = benchmark.seed(
+            users=4, groups=2, posts=12, comments=0, follows=3
+        )
+        cls.reader = User.objects.get(username=cls.dataset['reader'])
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_same_markup_as_django(self):
+        """Порты лент на Jinja2 дают ту же разметку с тем же контекстом"""
+        for name, template_name in benchmark.TEMPLATE_PAGES.items():
+            with self.subTest(page=name):
+                context, request = benchmark.page_context(
+                    self.reader_client, name, self.dataset, random.Random(0)
+                )
+                rendered = [
+                    normalize(engines[alias].get_template(
+                        template_name
+                    ).render(dict(context), request))
+                    for alias in benchmark.TEMPLATE_ENGINES
+                ]
+                self.assertEqual(rendered[0], rendered[1])
+
+    @override_settings(VIEW_TEMPLATE_ENGINES=JINJA_FEEDS)
+    def test_view_chooses_engine(self):
+        post = Post.objects.select_related('author').latest('created')
+        response = self.reader_client.get(reverse('posts:posts_index'))
+        self.assertEqual(response.status_code, 200)
+        # Шаблоны Django не отрисовывались: контекст тестовый клиент не
+        # получил.
+        self.assertEqual(response.templates, [])
+        self.assertContains(response, post.text)
+        self.assertContains(
+            response, reverse('posts:post_detail', args=[post.pk])
+        )
+        response = self.reader_client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertTemplateUsed(response, 'posts/post_detail.html')
+
+    @override_settings(VIEW_TEMPLATE_ENGINES=JINJA_FEEDS)
+    def test_page_shell(self):
+        """Оболочка страницы из Jinja2 размечает дырки как и шаблоны Django"""
+        url = reverse('posts:profile', args=[self.reader.username])
+        guest = Client().get(url).content.decode()
+        self.assertNotIn('<!--hole', guest)
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Пользователь: ' + self.reader.username)
+        self.assertNotContains(response, '<!--hole')
+
+    @override_settings(VIEW_TEMPLATE_ENGINES=JINJA_FEEDS)
+    def test_card_cache_invalidated(self):
+        post = Post.objects.latest('created')
+        self.reader_client.get(reverse('posts:posts_index'))
+        post.text = 'Новый текст поста'
+        post.save()
+        response = self.reader_client.get(reverse('posts:posts_index'))
+        self.assertContains(response, 'Новый текст поста')
+
+    def test_helpers(self):
+        class Form(forms.Form):
+            text = forms.CharField()
+
+        post = Post.objects.latest('created')
+        template = engines['jinja2'].from_string(
+            "{{ url('posts:post_detail', post.id) }}|"
+            "{{ form.text|addclass('form-control') }}|"
+            "{{ post.created|date('Y') }}"
+        )
+        url, field, year = template.render(
+            {'post': post, 'form': Form()}
+        ).split('|')
+        self.assertEqual(url, reverse('posts:post_detail', args=[post.pk]))
+        self.assertIn('class="form-control"', field)
+        self.assertEqual(year, str(post.created.year))
@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.urls import get_script_prefix, reverse, set_script_prefix
+
+from .. import links
+from ..models import Group, Post, User
+
+
+class LinksTest(TestCase):
+    def test_same_as_reverse(self):
+        cases = (
+            (links.post_url, 'posts:post_detail', [1, 42, 9876543210]),
+            (links.profile_url, 'posts:profile', [
+                'leo', 'user.name+tag@example', 'лев', 'a b', '100%',
+            ]),
+            (links.group_url, 'posts:posts_group', ['cats', 'my-group_1']),
+        )
+        for build, name, values in cases:
+            for value in values:
+                with self.subTest(name=name, value=value):
+                    self.assertEqual(
+                        build(value), reverse(name, args=[value])
+                    )
+
+    def test_script_prefix(self):
+        """Адреса учитывают SCRIPT_NAME, как reverse()"""
+        old_prefix = get_script_prefix()
+        set_script_prefix('/yatube/')
+        try:
+            self.assertEqual(links.post_url(5), '/yatube/posts/5/')
+            self.assertEqual(
+                links.profile_url('leo'),
+                reverse('posts:profile', args=['leo'])
+            )
+        finally:
+            set_script_prefix(old_prefix)
+        self.assertEqual(links.post_url(5), '/posts/5/')
+
+    def test_model_links(self):
+        author = User.objects.create_user(username='leo.tolstoy')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        post = Post.objects.create(author=author, group=group, text='Пост')
+        self.assertEqual(
+            post.get_absolute_url(),
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(
+            post.author_url, reverse('posts:profile', args=[author.username])
+        )
+        self.assertEqual(
+            post.group_url, reverse('posts:posts_group', args=[group.slug])
+        )
+        self.assertEqual(group.get_absolute_url(), post.group_url)
+        post.group = None
+        self.assertIsNone(post.group_url)
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import namespaced_key
+from core.cache.pages import HOLE_END, NAMESPACE
+from ..models import Follow, Group, Post, User
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(
+            username='reader', password='password'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_anonymous_pages_cached(self):
+        """Анонимная страница отдаётся из кеша без рендера шаблонов"""
+        for url in (
+            reverse('posts:posts_index'),
+            reverse('posts:posts_group', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(1):
+                    response = self.guest_client.get(url)
+                self.assertIsNone(response.context)
+                self.assertEqual(response.content, first.content)
+                self.assertNotContains(response, HOLE_END)
+
+    def test_user_fragments_filled(self):
+        """Вошедший получает оболочку со своей шапкой и кнопкой подписки"""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertIsNone(response.context.get('page_obj'))
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, 'Войти')
+        self.assertNotContains(response, HOLE_END)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'Отписаться')
+
+    def test_switcher_filled(self):
+        url = reverse('posts:posts_index')
+        self.guest_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertContains(response, reverse('posts:follow_index'))
+
+    def test_invalidated_by_new_post(self):
+        url = reverse('posts:posts_index')
+        self.guest_client.get(url)
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_login_keeps_cache(self):
+        """Вход сохраняет last_login и кеш страниц не сбрасывает"""
+        key = namespaced_key(NAMESPACE, 'page')
+        Client().login(username='reader', password='password')
+        self.assertEqual(namespaced_key(NAMESPACE, 'page'), key)
+        self.author.first_name = 'Лев'
+        self.author.save()
+        self.assertNotEqual(namespaced_key(NAMESPACE, 'page'), key)
+
+    def test_only_page_params_cached(self):
+        """Лишние параметры адреса не плодят копии страницы в кеше"""
+        url = reverse('posts:posts_index')
+        self.guest_client.get(url, {'utm_source': 'mail'})
+        response = self.guest_client.get(url, {'utm_source': 'mail'})
+        self.assertIsNotNone(response.context)
+        self.guest_client.get(url, {'page': '2'})
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url, {'page': '2'})
+        self.assertIsNone(response.context)
+        response = self.guest_client.get(url + '?page=2&page=3')
+        self.assertIsNotNone(response.context)
+
+    def test_cursor_pages_cached_separately(self):
+        url = reverse('posts:posts_index')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url, {'cursor': 'bad'})
+        self.assertIsNotNone(response.context)
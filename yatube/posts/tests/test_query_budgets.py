@@ -0,0 +1,118 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.querycount import QueryBudgetMixin, problems
+from ..models import Comment, Follow, Group, Post, User
+from ..urls import QUERY_BUDGETS
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Страницы укладываются в бюджеты запросов из posts/urls.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user_{i}') for i in range(4)
+        ]
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for i in range(12):
+            post = Post.objects.create(
+                author=cls.users[i % 3], group=cls.group, text=f'Пост {i}'
+            )
+            for author in cls.users[:3]:
+                Comment.objects.create(
+                    post=post, author=author, text='Комментарий'
+                )
+        cls.post = post
+        cls.reader = cls.users[3]
+        for author in cls.users[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def pages(self):
+        author = self.users[0].username
+        own_post = Post.objects.create(author=self.reader, text='Свой пост')
+        return [
+            ('get', reverse('posts:posts_index'), None),
+            ('get', reverse('posts:posts_group', args=['group']), None),
+            ('get', reverse('posts:search'), {'q': 'пост'}),
+            ('get', reverse('posts:profile', args=[author]), None),
+            ('get', reverse('posts:post_detail', args=[self.post.id]), None),
+            ('get', reverse('posts:post_create'), None),
+            ('post', reverse('posts:post_create'),
+             {'text': 'Новый пост', 'group': self.group.id}),
+            ('get', reverse('posts:post_edit', args=[own_post.id]), None),
+            ('post', reverse('posts:post_edit', args=[own_post.id]),
+             {'text': 'Исправленный пост', 'group': self.group.id}),
+            ('get', reverse('posts:comments', args=[self.post.id]), None),
+            ('post', reverse('posts:add_comment', args=[self.post.id]),
+             {'text': 'Ещё комментарий'}),
+            ('get', reverse('posts:follow_index'), None),
+            ('get', reverse('posts:profile_follow',
+                            args=[self.users[2].username]), None),
+            ('get', reverse('posts:profile_unfollow',
+                            args=[self.users[2].username]), None),
+            ('get', reverse('posts:api_posts'), None),
+            ('get', reverse('posts:api_group_posts', args=['group']),
+             {'fields': 'id,text'}),
+            ('get', reverse('posts:api_follow'), {'fields': 'id,author'}),
+        ]
+
+    def test_pages_within_budget(self):
+        for method, url, data in self.pages():
+            with self.subTest(url=url, method=method):
+                getattr(self.client, method)(url, data)
+
+    def test_pages_within_budget_with_warm_cache(self):
+        for method, url, data in self.pages():
+            getattr(self.client, method)(url, data)
+        for method, url, data in self.pages():
+            with self.subTest(url=url, method=method):
+                getattr(self.client, method)(url, data)
+
+    def test_streaming_queries_counted(self):
+        """Запросы при отдаче потокового ответа входят в бюджет"""
+        url = reverse('posts:api_posts')
+        ids = {'ids': str(self.post.id)}
+        response = self.client.get(url, ids)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['results'][0]['id'], self.post.id)
+        with mock.patch.dict(QUERY_BUDGETS, {'api_posts': 0}):
+            with self.assertRaisesMessage(AssertionError, 'бюджете 0'):
+                self.client.get(url, ids)
+
+    def test_every_page_has_budget(self):
+        from .. import urls
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+
+
+class QueryProblemsTest(TestCase):
+    def test_repeated_query_detected(self):
+        queries = [
+            {'sql': f'SELECT * FROM "auth_user" WHERE "id" = {i}'}
+            for i in range(3)
+        ]
+        found = problems(queries, repeat_limit=2)
+        self.assertEqual(len(found), 1)
+        self.assertIn('3 раз', found[0])
+
+    def test_in_lists_and_savepoints_normalized(self):
+        queries = [
+            {'sql': 'SAVEPOINT "s1_x1"'},
+            {'sql': "SELECT 1 WHERE a IN (1, 2, 3) AND b = 'x'"},
+            {'sql': "SELECT 1 WHERE a IN (4) AND b = 'y'"},
+            {'sql': 'RELEASE SAVEPOINT "s1_x1"'},
+        ]
+        self.assertEqual(len(problems(queries, repeat_limit=1)), 1)
+        self.assertEqual(problems(queries, budget=2, repeat_limit=2), [])
+        self.assertEqual(len(problems(queries, budget=1)), 1)
@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.explain import explain, problems
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
+from ..query_plans import audit
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user_{i}') for i in range(3)
+        ]
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for i in range(12):
+            post = Post.objects.create(
+                author=cls.users[i % 2], group=group, text=f'Пост {i}'
+            )
+            Comment.objects.create(
+                post=post, author=cls.users[2], text='Комментарий'
+            )
+        for author in cls.users[:2]:
+            Follow.objects.create(user=cls.users[2], author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_problems_detected(self):
+        """Аудит замечает полный проход и сортировку без индекса"""
+        with CaptureQueriesContext(connection) as queries:
+            list(Post.objects.order_by('text'))
+        self.assertTrue(problems(explain(queries[0]['sql'])))
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы всех лент обходятся индексами"""
+        call_command('audit_query_plans', stdout=StringIO())
+
+    def test_feed_queries_use_indexes_with_popular_authors(self):
+        """В ленте с популярными авторами сортируются только ключи их
+        постов: SQLite не сливает диапазоны IN по индексу"""
+        AuthorStats.objects.update(popular=True)
+        found = audit()
+        self.assertTrue(found)
+        for url, sql, bad in found:
+            self.assertIn('"posts_post"."author_id" IN', sql)
+            self.assertEqual(bad, ['USE TEMP B-TREE FOR ORDER BY'])
@@ -0,0 +1,177 @@
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post, SearchToken, User
+
+
+class SearchIndexMixin:
+    """Общие проверки индекса; подклассы выбирают реализацию."""
+    fts = None
+
+    def setUp(self):
+        patcher = mock.patch.object(
+            search, 'has_fts_table', return_value=self.fts
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='auth')
+        self.stoics = Post.objects.create(
+            author=self.user, text='Стоики учили спокойствию духа'
+        )
+        self.epicurus = Post.objects.create(
+            author=self.user, text='Эпикур учил радоваться простому'
+        )
+        self.comment = Comment.objects.create(
+            post=self.epicurus, author=self.user,
+            text='А стоики спорили с ним'
+        )
+
+    def test_migration_fills_index(self):
+        """Миграция 0011_search строит индекс без модуля posts.search"""
+        migration = import_module('posts.migrations.0011_search')
+
+        def execute(sql):
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+
+        editor = mock.Mock(connection=connection, execute=execute)
+        migration.drop_index(apps, editor)
+        SearchToken.objects.all().delete()
+        create_fts_table = migration.create_fts_table if self.fts else (
+            lambda schema_editor: False
+        )
+        with mock.patch.object(
+            migration, 'create_fts_table', create_fts_table
+        ):
+            migration.create_index(apps, editor)
+        self.assertEqual(
+            search.search_posts('стоики'),
+            [self.stoics.pk, self.epicurus.pk]
+        )
+
+    def test_backend(self):
+        index = search.backend()
+        if self.fts:
+            self.assertIsInstance(index, search.FTS5Index)
+        else:
+            self.assertIsInstance(index, search.TokenIndex)
+
+    def test_post_ranked_above_comment(self):
+        self.assertEqual(
+            search.search_posts('стоики'),
+            [self.stoics.pk, self.epicurus.pk]
+        )
+
+    def test_all_words_required(self):
+        self.assertEqual(
+            search.search_posts('стоики духа'), [self.stoics.pk]
+        )
+        self.assertEqual(search.search_posts('стоики радоваться'), [])
+
+    def test_empty_query(self):
+        self.assertEqual(search.search_posts(' ,. '), [])
+
+    def test_edit_reindexes(self):
+        self.stoics.text = 'Сенека писал письма'
+        self.stoics.save()
+        self.assertEqual(search.search_posts('спокойствию'), [])
+        self.assertEqual(search.search_posts('сенека'), [self.stoics.pk])
+
+    def test_delete_removes(self):
+        self.comment.delete()
+        self.assertEqual(search.search_posts('стоики'), [self.stoics.pk])
+        self.stoics.delete()
+        self.assertEqual(search.search_posts('стоики'), [])
+
+    def test_documents(self):
+        self.assertEqual(
+            search.search_documents(SearchToken.COMMENT, 'спорили'),
+            [self.comment.pk]
+        )
+        self.assertEqual(
+            search.search_documents(SearchToken.POST, 'спорили'), []
+        )
+
+    def test_rebuild(self):
+        search.backend().clear()
+        self.assertEqual(search.search_posts('стоики'), [])
+        self.assertEqual(search.rebuild(), 3)
+        self.assertEqual(
+            search.search_posts('стоики'),
+            [self.stoics.pk, self.epicurus.pk]
+        )
+
+
+class FTS5SearchTest(SearchIndexMixin, TestCase):
+    fts = True
+
+    def setUp(self):
+        if search.FTS_TABLE not in connection.introspection.table_names():
+            self.skipTest('SQLite собран без FTS5')
+        super().setUp()
+
+
+class TokenSearchTest(SearchIndexMixin, TestCase):
+    fts = False
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Стоик номер {i}')
+            for i in range(7)
+        ]
+
+    def test_tokenize(self):
+        self.assertEqual(
+            search.tokenize('Ёжик, ЁЛКА_test!'), ['ежик', 'елка', 'test']
+        )
+
+    def test_search_page(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'стоик'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 7)
+        self.assertEqual(len(page_obj), 5)
+        self.assertIsInstance(page_obj[0], Post)
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'стоик', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_empty_search_page(self):
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_uses_index(self):
+        model_admin = site._registry[Post]
+        queryset, distinct = model_admin.get_search_results(
+            None, Post.objects.all(), 'номер 3'
+        )
+        self.assertFalse(distinct)
+        self.assertEqual(list(queryset), [self.posts[3]])
+
+    def test_admin_search_page(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'стоик'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'лучших совпадений')
+        with mock.patch('posts.admin.SEARCH_LIMIT', 3):
+            response = client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'стоик'}
+            )
+        self.assertContains(response, 'Показаны 3 лучших совпадений')
+        self.assertEqual(response.context['cl'].result_count, 3)
@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post, User
+
+POST_TEXT = 'Тестовый текст'
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def uploaded():
+    return SimpleUploadedFile(
+        name='small.gif',
+        content=SMALL_GIF,
+        content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.guest_client = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        cache.clear()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text=POST_TEXT, author=self.user, image=uploaded()
+        )
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока превью не построено, страница отдаёт заглушку"""
+        response = self.guest_client.get(reverse('posts:posts_index'))
+        self.assertContains(response, static(thumbnails.PLACEHOLDER))
+
+    def test_generate_builds_all_sizes(self):
+        """Превью строятся для всех размеров и попадают в карточку"""
+        self.guest_client.get(reverse('posts:posts_index'))
+        thumbnails.generate(self.post.id, self.post.image.name)
+        for size in thumbnails.SIZES:
+            with self.subTest(size=size):
+                url = thumbnails.thumbnail_url(self.post, size)
+                self.assertTrue(url.startswith(settings.MEDIA_URL))
+        response = self.guest_client.get(reverse('posts:posts_index'))
+        self.assertContains(
+            response, thumbnails.thumbnail_url(self.post, 'index')
+        )
+        self.assertNotContains(response, static(thumbnails.PLACEHOLDER))
+
+    def test_generate_changes_etag(self):
+        """Готовое превью меняет ETag: страница с заглушкой не остаётся"""
+        url = reverse('posts:posts_index')
+        etag = self.guest_client.get(url)['ETag']
+        thumbnails.generate(self.post.id, self.post.image.name)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, static(thumbnails.PLACEHOLDER))
+
+    def test_ready_after_cache_loss(self):
+        """Без ключей в кеше (другой процесс, перезапуск) превью видны"""
+        thumbnails.generate(self.post.id, self.post.image.name)
+        url = thumbnails.thumbnail_url(self.post, 'index')
+        cache.clear()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertTrue(post.thumbnails_ready)
+        self.assertEqual(thumbnails.thumbnail_url(post, 'index'), url)
+        cache.clear()
+        response = self.guest_client.get(reverse('posts:posts_index'))
+        self.assertContains(response, url)
+        self.assertNotContains(response, static(thumbnails.PLACEHOLDER))
+
+    def test_new_image_resets_ready(self):
+        thumbnails.generate(self.post.id, self.post.image.name)
+        post = Post.objects.get(pk=self.post.pk)
+        post.image = uploaded()
+        post.save()
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
+
+    def test_missing_image_keeps_placeholder(self):
+        thumbnails.generate(self.post.id, 'posts/missing.gif')
+        self.assertFalse(thumbnails.is_ready('posts/missing.gif'))
+
+    def test_generate_thumbnails_command(self):
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertTrue(thumbnails.is_ready(self.post.image.name))
+        self.assertIn('1', out.getvalue())
+        # Готовые посты пропускаются, даже если кеш пуст.
+        cache.clear()
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('постов: 0', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailQueueTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_saving_image_enqueues_thumbnails(self):
+        """После коммита поста с картинкой превью уже построены"""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(
+            text=POST_TEXT, author=user, image=uploaded()
+        )
+        self.assertTrue(thumbnails.is_ready(post.image.name))
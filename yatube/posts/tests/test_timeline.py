@@ -0,0 +1,93 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import timeline
+from ..models import AuthorStats, Follow, Post, TimelineEntry, User
+
+POST_TEXT = 'Тестовый текст'
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cache.clear()
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост автора попадает в ленты его подписчиков"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        Post.objects.create(text=POST_TEXT, author=self.other_author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_cleans_timeline(self):
+        """Подписка подтягивает старые посты, отписка их убирает"""
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.feed(), [post])
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+        self.assertEqual(self.feed(), [])
+
+    def test_popular_author_is_read_on_demand(self):
+        """Посты популярного автора подмешиваются при чтении ленты"""
+        with mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 0):
+            Follow.objects.create(user=self.user, author=self.author)
+            post = Post.objects.create(text=POST_TEXT, author=self.author)
+            self.assertFalse(TimelineEntry.objects.exists())
+            self.assertEqual(self.feed(), [post])
+
+    def test_author_crossing_limit(self):
+        """Автор, ставший популярным, уходит из лент, а переставший —
+        раскладывается по лентам подписчиков"""
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        reader = User.objects.create_user(username='reader')
+        with mock.patch.object(timeline, 'FANOUT_FOLLOWERS_LIMIT', 1):
+            follow = Follow.objects.create(user=reader, author=self.author)
+            self.assertTrue(AuthorStats.objects.get(user=self.author).popular)
+            self.assertFalse(TimelineEntry.objects.exists())
+            self.assertEqual(self.feed(), [post])
+            follow.delete()
+        self.assertFalse(AuthorStats.objects.get(user=self.author).popular)
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.user.id, post.id)]
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timeline восстанавливает ленты из подписок"""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text=POST_TEXT, author=self.author)
+        TimelineEntry.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_timeline', 'auth', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
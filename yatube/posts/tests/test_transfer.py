@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import transfer
+from ..models import (
+    AuthorStats, Comment, Follow, Group, Post, TimelineEntry, User
+)
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group if i % 2 else None,
+                text=f'Пост {i}, "в кавычках"\nи с переводом строки',
+                image='posts/file.jpg' if i == 0 else '',
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def snapshot(self):
+        return {
+            'posts': list(Post.objects.order_by('pk').values_list(
+                'id', 'author__username', 'group__slug', 'text', 'image',
+                'created', 'comment_count'
+            )),
+            'comments': list(Comment.objects.values_list(
+                'id', 'post_id', 'author__username', 'text', 'created'
+            )),
+            'follows': list(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            'groups': list(Group.objects.values_list(
+                'slug', 'title', 'description', 'post_count'
+            )),
+            'names': list(User.objects.order_by('username').values_list(
+                'username', 'first_name', 'last_name'
+            )),
+        }
+
+    def clear(self):
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+
+    def roundtrip(self, name):
+        before = self.snapshot()
+        path = self.path(name)
+        call_command('export_yatube', path, stderr=StringIO())
+        self.clear()
+        out = StringIO()
+        call_command('import_yatube', path, batch_size=3, stdout=out)
+        self.assertIn('записей/с', out.getvalue())
+        self.assertIn(f'post {len(self.posts)}, comment 1', out.getvalue())
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(AuthorStats.objects.get(
+            user__username='author'
+        ).post_count, len(self.posts))
+        self.assertEqual(TimelineEntry.objects.count(), len(self.posts))
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_roundtrip_ndjson(self):
+        self.roundtrip('dump.ndjson')
+
+    def test_roundtrip_csv(self):
+        self.roundtrip('dump.csv')
+
+    def test_resume_from_checkpoint(self):
+        """После ошибки загрузка продолжается с последней пачки"""
+        path = self.path('dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        with open(path, encoding='utf-8') as file:
+            lines = file.readlines()
+        # Пост неизвестного автора в предпоследней пачке.
+        broken = lines[:6] + [
+            lines[6].replace('"author":"author"', '"author":"missing"')
+        ] + lines[7:]
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(broken)
+        self.clear()
+        with self.assertRaisesMessage(CommandError, 'запись 7'):
+            call_command(
+                'import_yatube', path, batch_size=3, stdout=StringIO()
+            )
+        self.assertEqual(transfer.read_checkpoint(f'{path}.checkpoint'), 6)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(lines)
+        out = StringIO()
+        call_command('import_yatube', path, batch_size=3, stdout=out)
+        self.assertIn('Продолжаю после записи 6', out.getvalue())
+        self.assertEqual(Post.objects.count(), len(self.posts))
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_is_idempotent(self):
+        path = self.path('dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        before = self.snapshot()
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out)
+        self.assertEqual(self.snapshot(), before)
+        self.assertIn(
+            'group 0, user 0, post 0, comment 0, follow 0', out.getvalue()
+        )
+
+    def test_conflicting_ids(self):
+        """Занятый другим постом id останавливает загрузку"""
+        path = self.path('dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        self.clear()
+        author = User.objects.create_user(username='author')
+        other = Post.objects.create(
+            id=self.posts[0].id, author=author, text='Другой пост'
+        )
+        with self.assertRaisesMessage(
+            CommandError, f'пост {other.id} уже есть в базе'
+        ):
+            call_command('import_yatube', path, stdout=StringIO())
+        self.assertEqual(list(Post.objects.all()), [other])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_missing_images_reported(self):
+        path = self.path('dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        out = StringIO()
+        call_command('import_yatube', path, no_rebuild=True, stdout=out)
+        self.assertIn('Нет файлов картинок в хранилище: 1', out.getvalue())
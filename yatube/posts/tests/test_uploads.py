@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(width, height):
+    output = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(output, 'PNG')
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def upload(self, name, content):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Текст',
+                'image': SimpleUploadedFile(name, content, 'image/png'),
+            }
+        )
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'form', 'image', message)
+        self.assertFalse(Post.objects.exists())
+
+    def test_small_image_saved_as_is(self):
+        content = png(10, 10)
+        self.upload('small.png', content)
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, 'posts/small.png')
+        self.assertEqual(post.image.read(), content)
+
+    @override_settings(POST_IMAGE_MAX_SIZE=1024)
+    def test_too_large_file_rejected(self):
+        response = self.upload('big.png', png(10, 10) + b'\0' * 2048)
+        self.assertRejected(response, 'Файл слишком большой.')
+
+    @override_settings(POST_IMAGE_MAX_SIZE=1024)
+    def test_fields_after_rejected_file_kept(self):
+        """Отклонённый файл пропускается, поля после него разбираются"""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'image': SimpleUploadedFile(
+                    'big.png', png(10, 10) + b'\0' * 2048, 'image/png'
+                ),
+                'text': 'Текст после файла',
+            }
+        )
+        self.assertRejected(response, 'Файл слишком большой.')
+        self.assertEqual(
+            response.context['form']['text'].value(), 'Текст после файла'
+        )
+
+    def test_csrf_checked(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Текст', 'image': SimpleUploadedFile(
+                'small.png', png(10, 10), 'image/png'
+            )}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Post.objects.exists())
+
+    def test_not_an_image_rejected(self):
+        response = self.upload('fake.png', b'not an image' * 10)
+        self.assertRejected(response, 'Загрузите картинку.')
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected(self):
+        response = self.upload('wide.png', png(20, 10))
+        self.assertRejected(
+            response, 'Слишком большое разрешение картинки.'
+        )
+
+    @override_settings(POST_IMAGE_MAX_SIDE=20)
+    def test_large_image_downscaled(self):
+        self.upload('large.png', png(50, 40))
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, 'posts/large.jpg')
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (20, 16))
+            self.assertEqual(image.format, 'JPEG')
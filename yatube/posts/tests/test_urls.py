@@ -44,6 +44,10 @@ class PostURLTests(TestCase):
 
         cache.clear()
 
+    def setUp(self):
+        # Закешированная страница отдаётся без рендера шаблонов.
+        cache.clear()
+
     def test_homepage(self):
         # Делаем запрос к главной странице и проверяем статус
         response = self.guest_client.get('/')
@@ -1,14 +1,19 @@
+import base64
 import shutil
 import tempfile
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
 
+from ..cards import card_keys
 from ..models import Post, Group, User, Comment, Follow
+from ..views import NUMBER_OF_COMMENTS, NUMBER_OF_POSTS
 
 GROUP_TITLE = 'Тестовый заголовок'
 GROUP_SLUG = 'test_slug'
@@ -209,9 +214,10 @@ class CacheTest(TestCase):
         cls.user = User.objects.create_user(username='auth')
         cls.authorized_client = Client()
         cls.authorized_client.force_login(cls.user)
-        cls.post = Post.objects.create(
-            text=POST_TEXT,
-            author=cls.user
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION
         )
 
     @classmethod
@@ -219,28 +225,51 @@ class CacheTest(TestCase):
         super().tearDownClass()
         cache.clear()
 
-    def test_cache(self):
-        """Проверка кеширования главной страницы"""
-        url = reverse('posts:posts_index')
-
-        response_before = CacheTest.authorized_client.get(url)
-
-        CacheTest.post.delete()
-
-        response_after = CacheTest.authorized_client.get(url)
-
+    def setUp(self):
         cache.clear()
-
-        response_cache_clear = CacheTest.authorized_client.get(url)
-
-        self.assertEqual(
-            response_before.content,
-            response_after.content
-        )
-        self.assertNotEqual(
-            response_before.content,
-            response_cache_clear.content
+        self.post = Post.objects.create(
+            text=POST_TEXT,
+            author=CacheTest.user,
+            group=CacheTest.group
         )
+        self.url = reverse('posts:posts_index')
+
+    def test_cache(self):
+        """Карточка поста берётся из кеша, пока пост не изменился"""
+        CacheTest.authorized_client.get(self.url)
+        self.assertIsNotNone(cache.get(
+            card_keys(self.post.id, self.post.cache_version)[1]
+        ))
+        # update() не меняет версию карточки, поэтому виден кеш
+        Post.objects.filter(pk=self.post.pk).update(text='Обход сигналов')
+        response = CacheTest.authorized_client.get(self.url)
+        self.assertContains(response, POST_TEXT)
+
+    def test_cache_invalidated_on_edit(self):
+        """Редактирование поста сразу меняет его карточку"""
+        CacheTest.authorized_client.get(self.url)
+        self.post.text = 'Новый тестовый текст'
+        self.post.save()
+        response = CacheTest.authorized_client.get(self.url)
+        self.assertContains(response, 'Новый тестовый текст')
+
+    def test_cache_invalidated_on_delete(self):
+        """Удалённый пост пропадает с главной страницы"""
+        CacheTest.authorized_client.get(self.url)
+        version = self.post.cache_version
+        post_id = self.post.id
+        self.post.delete()
+        response = CacheTest.authorized_client.get(self.url)
+        self.assertNotContains(response, POST_TEXT)
+        self.assertIsNone(cache.get(card_keys(post_id, version)[1]))
+
+    def test_cache_invalidated_on_group_change(self):
+        """Изменение группы меняет карточки её постов"""
+        CacheTest.authorized_client.get(self.url)
+        CacheTest.group.slug = 'new_slug'
+        CacheTest.group.save()
+        response = CacheTest.authorized_client.get(self.url)
+        self.assertContains(response, '/group/new_slug/')
 
 
 class FollowTest(TestCase):
@@ -312,8 +341,7 @@ class PaginatorViewsTest(TestCase):
             description=GROUP_DESCRIPTION
         )
         cls.TOTAL_NUMBERS_POSTS = 13  # Общее количество постов
-        cls.FIRST_PAGE_POSTS = 10  # Количество постов на первой странице
-        cls.SECOND_PAGE_POSTS = 3  # Количество постов на второй странице
+        cls.PAGES_POSTS = (5, 5, 3)  # Количество постов на страницах
         cls.posts_list = [
             Post(
                 text=(str(i) + POST_TEXT),
@@ -329,35 +357,201 @@ class PaginatorViewsTest(TestCase):
         super().tearDownClass()
         cache.clear()
 
-    def test_first_page_contains_ten_records(self):
-        response_page_1 = {
-            'posts_index': self.client.get(
-                reverse('posts:posts_index')
-            ),
-            'posts_group': self.client.get(
-                reverse('posts:posts_group', kwargs={'slug': 'test_slug'})
-            ),
-            'posts_profile': self.client.get(
-                reverse('posts:profile', kwargs={'username': 'other_auth'})
-            ),
-        }
+    def setUp(self):
+        cache.clear()
 
-        response_page_2 = {
-            'posts_index': self.client.get(
-                reverse('posts:posts_index') + '?page=2'),
-            'posts_group': self.client.get(
-                reverse('posts:posts_group', kwargs={'slug': 'test_slug'})
-                + '?page=2'),
-            'posts_profile': self.client.get(
-                reverse('posts:profile', kwargs={'username': 'other_auth'})
-                + '?page=2'),
-        }
-        for page, response in response_page_1.items():
-            with self.subTest(response=response):
-                self.assertEqual(len(response.context['page_obj']),
-                                 PaginatorViewsTest.FIRST_PAGE_POSTS)
+    def walk(self, url):
+        """Проходим ленту по курсорам next_cursor до конца"""
+        pages = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(url, {'cursor': cursor})
+            pages.append(response.context['page_obj'])
+            cursor = response.context['page_obj'].paginator.next_cursor
+        return pages
+
+    def test_pages_contain_correct_records(self):
+        urls = (
+            reverse('posts:posts_index'),
+            reverse('posts:posts_group', kwargs={'slug': 'test_slug'}),
+            reverse('posts:profile', kwargs={'username': 'other_auth'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                self.assertEqual(tuple(len(page) for page in pages),
+                                 PaginatorViewsTest.PAGES_POSTS)
+                posts = [post for page in pages for post in page]
+                self.assertEqual(
+                    [post.id for post in posts],
+                    list(Post.objects.order_by('-created', '-id')
+                         .values_list('id', flat=True))
+                )
 
-        for page, response in response_page_2.items():
-            with self.subTest(response=response):
-                self.assertEqual(len(response.context['page_obj']),
-                                 PaginatorViewsTest.SECOND_PAGE_POSTS)
+    def test_previous_cursor(self):
+        """Курсор previous_cursor возвращает на предыдущую страницу"""
+        url = reverse('posts:posts_index')
+        first, second, _ = self.walk(url)
+        response = self.client.get(
+            url, {'cursor': second.paginator.previous_cursor}
+        )
+        page = response.context['page_obj']
+        self.assertEqual(list(page), list(first))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор отдаёт первую страницу"""
+        url = reverse('posts:posts_index')
+        response = self.client.get(url, {'cursor': 'не-курсор'})
+        page = response.context['page_obj']
+        self.assertEqual(len(page), PaginatorViewsTest.PAGES_POSTS[0])
+        self.assertFalse(page.has_previous())
+
+    def test_forged_cursor(self):
+        """Курсор с null и значениями не тех типов отдаёт первую страницу"""
+        for raw in ('["n",null,null]', '["n","",""]', '["p",1,2]',
+                    '["n",["x"],{}]', '"nab"', '["n"]'):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            for url in (reverse('posts:posts_index'),
+                        reverse('posts:api_posts')):
+                with self.subTest(raw=raw, url=url):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+
+    def test_page_query_count_does_not_depend_on_depth(self):
+        """Глубокая страница стоит столько же запросов, сколько первая"""
+        url = reverse('posts:profile', kwargs={'username': 'other_auth'})
+        last = self.walk(url)[-1]
+        cursor = last.paginator.previous_cursor
+        with CaptureQueriesContext(connection) as first_page:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as deep_page:
+            self.client.get(url, {'cursor': cursor})
+        self.assertEqual(len(first_page), len(deep_page))
+        for query in deep_page.captured_queries:
+            self.assertNotIn('OFFSET', query['sql'])
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text=POST_TEXT, author=cls.user)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {i}'
+            )
+            for i in range(NUMBER_OF_COMMENTS + 3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_first_page_and_load_more(self):
+        """Пост показывает первую страницу, остальное подгружается"""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        page = response.context['comments']
+        self.assertEqual(
+            list(page), self.comments[:NUMBER_OF_COMMENTS]
+        )
+        self.assertEqual(page.paginator.count, len(self.comments))
+        self.assertContains(response, f'Комментариев: {len(self.comments)}')
+        more_url = reverse('posts:comments', args=[self.post.id])
+        self.assertContains(response, more_url)
+        # Скрипт «Показать ещё» один и стоит в теле страницы, не в title.
+        html = response.content.decode()
+        title = html[html.index('<title>'):html.index('</title>')]
+        self.assertNotIn('<script', title)
+        self.assertEqual(html.count('data-comments-url]'), 1)
+        response = self.guest_client.get(
+            more_url, {'cursor': page.paginator.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            list(response.context['comments']),
+            self.comments[NUMBER_OF_COMMENTS:]
+        )
+        self.assertNotContains(response, more_url)
+
+    def test_query_count_does_not_depend_on_comments(self):
+        """Страница поста не считает комментарии и не ходит за авторами"""
+        url = reverse('posts:post_detail', args=[self.post.id])
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'])
+        Comment.objects.create(
+            post=self.post, author=User.objects.create_user('other'),
+            text=COMMENT_TEXT
+        )
+        with self.assertNumQueries(len(queries)):
+            self.guest_client.get(url)
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cache.clear()
+
+    def add_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(
+                username=f'author_{Post.objects.count()}'
+            )
+            Follow.objects.create(user=self.user, author=author)
+            Post.objects.create(text=POST_TEXT, author=author,
+                                group=self.group)
+
+    def count_queries(self, url, data=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url, data)
+        return len(queries), response.context['page_obj']
+
+    def assert_constant_queries(self, url):
+        """Полная страница и страница с одним постом стоят одинаково"""
+        full_queries, full_page = self.count_queries(url)
+        last_queries, last_page = self.count_queries(
+            url, {'cursor': full_page.paginator.next_cursor}
+        )
+        self.assertEqual(len(full_page), NUMBER_OF_POSTS)
+        self.assertEqual(len(last_page), 1)
+        self.assertEqual(full_queries, last_queries)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Число запросов ленты не растёт вместе с числом постов"""
+        self.add_posts(NUMBER_OF_POSTS + 1)
+        urls = (
+            reverse('posts:posts_index'),
+            reverse('posts:posts_group', kwargs={'slug': GROUP_SLUG}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_constant_queries(url)
+
+    def test_profile_query_count_does_not_depend_on_page_size(self):
+        for i in range(NUMBER_OF_POSTS + 1):
+            Post.objects.create(text=POST_TEXT, author=self.user,
+                                group=self.group)
+        self.assert_constant_queries(
+            reverse('posts:profile', kwargs={'username': 'auth'})
+        )
@@ -0,0 +1,121 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.templatetags.static import static
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core.cache.pages import invalidate_pages
+from . import cards
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Размеры превью, которые используют шаблоны: имя -> (геометрия, опции).
+SIZES = {
+    'index': ('300x300', {}),
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+PLACEHOLDER = 'img/thumb_placeholder.svg'
+THUMBNAIL_KEY = 'thumbnail:{}:{}'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_key(image_name, size):
+    return THUMBNAIL_KEY.format(size, image_name)
+
+
+def is_ready(image_name):
+    return all(
+        cache.get(thumbnail_key(image_name, size)) for size in SIZES
+    )
+
+
+def thumbnail_url(post, size):
+    """Готовый URL превью или заглушка, если превью ещё не построено.
+
+    Кеш — только ускорение: признак готовности хранится в посте
+    (thumbnails_ready). Если URL в кеше нет (другой процесс, перезапуск,
+    вытеснение), а превью построены, sorl находит готовый файл в своём
+    хранилище ключей и ничего не строит заново.
+    """
+    key = thumbnail_key(post.image.name, size)
+    url = cache.get(key)
+    if url is None and post.thumbnails_ready:
+        geometry, options = SIZES[size]
+        url = get_thumbnail(post.image.name, geometry, **options).url
+        cache.set(key, url, None)
+    return url or static(PLACEHOLDER)
+
+
+def generate(post_id, image_name):
+    """Построить все размеры превью картинки и сбросить карточку поста."""
+    try:
+        for size, (geometry, options) in SIZES.items():
+            thumbnail = get_thumbnail(image_name, geometry, **options)
+            if not thumbnail.exists():
+                raise FileNotFoundError(image_name)
+            cache.set(thumbnail_key(image_name, size), thumbnail.url, None)
+        post = Post.objects.filter(
+            pk=post_id, image=image_name
+        ).only('updated').first()
+        if post is not None:
+            # Новая версия поста: карточки с заглушкой и ETag страниц
+            # с ними устаревают.
+            Post.objects.filter(pk=post_id, image=image_name).update(
+                thumbnails_ready=True, updated=timezone.now()
+            )
+            cards.invalidate(post.pk, post.cache_version)
+            invalidate_pages()
+    except Exception:
+        logger.exception('Не удалось построить превью %s', image_name)
+
+
+def _work(post_id, image_name):
+    generate(post_id, image_name)
+    # Поток пула живёт долго: соединение с базой закрываем сами.
+    close_old_connections()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+    return _executor
+
+
+def wait():
+    """Дождаться всех превью, поставленных в очередь пула."""
+    global _executor
+    with _executor_lock:
+        pool, _executor = _executor, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def enqueue(post):
+    """Поставить построение превью в очередь после коммита транзакции.
+
+    При THUMBNAIL_WORKERS = 0 превью строятся сразу, в том же потоке.
+    """
+    if not post.image:
+        return
+    post_id, image_name = post.pk, post.image.name
+
+    def submit():
+        if settings.THUMBNAIL_WORKERS:
+            executor().submit(_work, post_id, image_name)
+        else:
+            generate(post_id, image_name)
+
+    transaction.on_commit(submit)
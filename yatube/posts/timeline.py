@@ -0,0 +1,174 @@
+from core.paginator import PREVIOUS, CursorPaginator
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+# Посты авторов с большим числом подписчиков не раскладываются по лентам
+# при публикации, а подмешиваются при чтении. Кто из авторов популярен,
+# хранит флаг AuthorStats.popular: по нему решают и запись, и чтение.
+FANOUT_FOLLOWERS_LIMIT = 1000
+# Сколько последних постов автора попадает в ленту при подписке.
+BACKFILL_POSTS = 100
+BATCH_SIZE = 500
+
+
+def is_popular(author_id):
+    return AuthorStats.objects.filter(user_id=author_id, popular=True).exists()
+
+
+def update_popularity(author_id):
+    """Сверить флаг popular автора с числом его подписчиков.
+
+    Автор, перешедший порог, убирается из материализованных лент, а
+    опустившийся до порога раскладывается по лентам всех подписчиков.
+    Возвращает значение флага.
+    """
+    stats = AuthorStats.objects.filter(user_id=author_id).values_list(
+        'popular', 'follower_count'
+    ).first()
+    if stats is None:
+        return False
+    popular = stats[1] > FANOUT_FOLLOWERS_LIMIT
+    if popular == stats[0]:
+        return popular
+    # Переход делает тот, кто первым сменил флаг.
+    if not AuthorStats.objects.filter(
+        user_id=author_id, popular=not popular
+    ).update(popular=popular):
+        return popular
+    if popular:
+        TimelineEntry.objects.filter(post__author_id=author_id).delete()
+    else:
+        for user_id in Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True).iterator():
+            _backfill(user_id, author_id)
+    return popular
+
+
+def _bulk_insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.id, created=post.created)
+        for user_id in followers.iterator()
+    )
+
+
+def add_author(user_id, author_id):
+    """Подтянуть в ленту последние посты автора после подписки."""
+    if not update_popularity(author_id):
+        _backfill(user_id, author_id)
+
+
+def _backfill(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('id', 'created')[:BACKFILL_POSTS]
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+        for post_id, created in posts
+    )
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    update_popularity(author_id)
+
+
+def rebuild(users=None):
+    """Пересобрать ленты пользователей (или всех) из подписок.
+
+    Возвращает количество обработанных подписок.
+    """
+    follows = Follow.objects.all()
+    entries = TimelineEntry.objects.all()
+    if users is not None:
+        follows = follows.filter(user__in=users)
+        entries = entries.filter(user__in=users)
+    entries.delete()
+    stats = AuthorStats.objects.all()
+    stats.filter(follower_count__gt=FANOUT_FOLLOWERS_LIMIT).update(
+        popular=True
+    )
+    stats.filter(follower_count__lte=FANOUT_FOLLOWERS_LIMIT).update(
+        popular=False
+    )
+    processed = 0
+    for user_id, author_id in follows.exclude(
+        author__stats__popular=True
+    ).values_list('user_id', 'author_id').iterator():
+        _backfill(user_id, author_id)
+        processed += 1
+    return processed
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная выдача ленты подписок.
+
+    Лента складывается из материализованной части (TimelineEntry) и
+    постов популярных авторов. Каждый источник читается отдельным
+    запросом с тем же ключом (created, id), ключи сливаются в памяти, а
+    посты страницы выбираются одним запросом. Так в планах нет OR по
+    двум таблицам; сортируются только ключи постов популярных авторов
+    после курсора (SQLite не сливает диапазоны IN по индексу).
+    """
+
+    def __init__(self, user, per_page, total=None, object_list=None):
+        self.user = user
+        if object_list is None:
+            object_list = Post.objects.for_feed()
+        super().__init__(object_list, per_page, total=total)
+
+    def sources(self):
+        """Пары (queryset, поля ключа) источников ленты."""
+        yield TimelineEntry.objects.filter(user=self.user), (
+            'created', 'post_id'
+        )
+        popular = list(Follow.objects.filter(
+            user=self.user, author__stats__popular=True
+        ).values_list('author_id', flat=True))
+        if popular:
+            yield Post.objects.filter(author_id__in=popular), (
+                'created', 'id'
+            )
+
+    def fetch(self, direction, values):
+        limit = self.per_page + 1
+        backwards = direction == PREVIOUS
+        keys = set()
+        for queryset, fields in self.sources():
+            ordering = ['-' + field for field in fields]
+            queryset = queryset.order_by(*ordering)
+            if values is not None:
+                queryset = queryset.filter(
+                    self._seek(values, backwards, ordering)
+                )
+                if backwards:
+                    queryset = queryset.reverse()
+            keys.update(queryset.values_list(*fields)[:limit])
+        keys = sorted(keys, reverse=not backwards)[:limit]
+        # object_list может быть и .values(), поэтому не in_bulk.
+        rows = self.object_list.filter(
+            pk__in=[pk for created, pk in keys]
+        ).order_by()
+        posts = {
+            row['id'] if isinstance(row, dict) else row.pk: row
+            for row in rows
+        }
+        return [posts[pk] for created, pk in keys if pk in posts]
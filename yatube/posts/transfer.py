@@ -0,0 +1,379 @@
+import csv
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache.pages import invalidate_pages
+from . import counters, follow, search, timeline
+from .models import Comment, Follow, Group, Post, User
+
+# Выгрузка и загрузка данных постов потоком записей. Запись — словарь с
+# ключом type и полями FIELDS[type]; ссылки на пользователей и группы
+# идут по username и slug, на посты — по номеру. Виды записей идут в
+# порядке KINDS: каждый ссылается только на предыдущие.
+KINDS = ('group', 'user', 'post', 'comment', 'follow')
+FIELDS = {
+    'group': ('slug', 'title', 'description'),
+    'user': ('username', 'first_name', 'last_name', 'email'),
+    'post': ('id', 'author', 'group', 'text', 'image', 'created'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('user', 'author'),
+}
+CSV_COLUMNS = ['type'] + list(dict.fromkeys(
+    field for kind in KINDS for field in FIELDS[kind]
+))
+FORMATS = ('ndjson', 'csv')
+BATCH_SIZE = 1000
+
+
+class TransferError(ValueError):
+    def __init__(self, number, message):
+        super().__init__(f'запись {number}: {message}')
+        self.number = number
+
+
+def format_for(path, default='ndjson'):
+    """Формат по расширению файла: .csv или NDJSON."""
+    return 'csv' if path and path.endswith('.csv') else default
+
+
+def export_records(chunk_size=BATCH_SIZE):
+    """Все группы, пользователи, посты, комментарии и подписки.
+
+    Строки читаются .values_list().iterator() кусками по chunk_size,
+    поэтому память не зависит от размера базы.
+    """
+    querysets = {
+        'group': Group.objects.values_list(*FIELDS['group']),
+        'user': User.objects.values_list(*FIELDS['user']),
+        'post': Post.objects.values_list(
+            'id', 'author__username', 'group__slug', 'text', 'image',
+            'created'
+        ),
+        'comment': Comment.objects.values_list(
+            'id', 'post_id', 'author__username', 'text', 'created'
+        ),
+        'follow': Follow.objects.values_list(
+            'user__username', 'author__username'
+        ),
+    }
+    for kind in KINDS:
+        rows = querysets[kind].order_by('pk').iterator(chunk_size=chunk_size)
+        for row in rows:
+            record = {'type': kind, **dict(zip(FIELDS[kind], row))}
+            if record.get('created') is not None:
+                # isoformat() сохраняет микросекунды, в отличие от
+                # DjangoJSONEncoder.
+                record['created'] = record['created'].isoformat()
+            yield record
+
+
+def write_ndjson(records, file):
+    for record in records:
+        file.write(json.dumps(
+            record, ensure_ascii=False, separators=(',', ':')
+        ) + '\n')
+
+
+def write_csv(records, file):
+    writer = csv.DictWriter(file, CSV_COLUMNS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow({
+            key: '' if value is None else value
+            for key, value in record.items()
+        })
+
+
+def read_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(file):
+    # Тексты постов бывают длиннее стандартного предела модуля csv.
+    csv.field_size_limit(sys.maxsize)
+    for row in csv.DictReader(file):
+        kind = row.get('type')
+        yield {
+            'type': kind,
+            **{field: row.get(field) for field in FIELDS.get(kind, ())}
+        }
+
+
+WRITERS = {'ndjson': write_ndjson, 'csv': write_csv}
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def read_checkpoint(path):
+    """Сколько записей уже загружено по файлу контрольной точки."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['records']
+
+
+def write_checkpoint(path, records):
+    """Записать контрольную точку атомарно: через временный файл."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump({'records': records}, file)
+    os.replace(temporary, path)
+
+
+@contextmanager
+def keep_created(*models):
+    """Не подменять created текущим временем при bulk_create."""
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _text(value):
+    return value or ''
+
+
+def _int(number, value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise TransferError(number, f'{name} должно быть числом: {value!r}')
+
+
+def _created(number, value):
+    if not value:
+        return timezone.now()
+    created = parse_datetime(value) if isinstance(value, str) else value
+    if created is None:
+        raise TransferError(number, f'некорректная дата {value!r}')
+    return created
+
+
+class Importer:
+    """Загрузка потока записей пачками через bulk_create.
+
+    Пачка из batch_size записей загружается в одной транзакции; ссылки
+    на пользователей, группы и посты пачки разрешаются несколькими
+    запросами на пачку. Повторная загрузка уже загруженной пачки ничего
+    не дублирует, поэтому после сбоя можно продолжать с контрольной
+    точки. Посты и комментарии сохраняют свои id; если id занят другой
+    записью, загрузка останавливается. counts — число действительно
+    вставленных строк.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.counts = Counter()
+        self.missing_images = 0
+
+    def run(self, records, skip=0, on_batch=None):
+        """Загрузить records, пропустив первые skip.
+
+        После каждой пачки вызывается on_batch(загружено записей).
+        Возвращает общее число обработанных записей.
+        """
+        records = enumerate(islice(records, skip, None), start=skip + 1)
+        done = skip
+        with keep_created(Post, Comment):
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    self.load(batch)
+                done = batch[-1][0]
+                if on_batch is not None:
+                    on_batch(done)
+        self.reset_sequences()
+        return done
+
+    def load(self, batch):
+        by_kind = defaultdict(list)
+        for number, record in batch:
+            kind = record.get('type')
+            if kind not in FIELDS:
+                raise TransferError(number, f'неизвестный тип {kind!r}')
+            by_kind[kind].append((number, {
+                field: record.get(field) for field in FIELDS[kind]
+            }))
+        for kind in KINDS:
+            if by_kind[kind]:
+                self.counts[kind] += getattr(self, f'load_{kind}')(
+                    by_kind[kind]
+                )
+
+    def users(self, rows, *fields):
+        """username -> id для полей fields записей пачки."""
+        names = {record[field] for number, record in rows for field in fields}
+        found = dict(User.objects.filter(
+            username__in=names
+        ).values_list('username', 'id'))
+        for number, record in rows:
+            for field in fields:
+                if record[field] not in found:
+                    raise TransferError(
+                        number, f'нет пользователя {record[field]!r}'
+                    )
+        return found
+
+    def insert(self, kind, rows, objects, fields):
+        """Вставить объекты с явными id, которых ещё нет в базе.
+
+        Строка с тем же id и теми же fields уже загружена раньше и
+        пропускается. С другими fields это чужая запись: она не
+        перезаписывается и не пропускается молча, иначе комментарии
+        загружаемого поста привязались бы к ней. Возвращает число
+        вставленных строк.
+        """
+        model = type(objects[0])
+        found = {
+            row[0]: row[1:] for row in model.objects.filter(
+                pk__in=[instance.id for instance in objects]
+            ).values_list('id', *fields)
+        }
+        new = []
+        for (number, record), instance in zip(rows, objects):
+            values = tuple(getattr(instance, field) for field in fields)
+            if instance.id not in found:
+                found[instance.id] = values
+                new.append(instance)
+            elif found[instance.id] != values:
+                raise TransferError(
+                    number, f'{kind} {instance.id} уже есть в базе с другим '
+                    f'содержимым'
+                )
+        model.objects.bulk_create(new)
+        return len(new)
+
+    def load_group(self, rows):
+        slugs = {record['slug'] for number, record in rows}
+        existing = Group.objects.filter(slug__in=slugs).count()
+        Group.objects.bulk_create([
+            Group(
+                slug=record['slug'], title=_text(record['title']),
+                description=_text(record['description']),
+            )
+            for number, record in rows
+        ], ignore_conflicts=True)
+        return Group.objects.filter(slug__in=slugs).count() - existing
+
+    def load_user(self, rows):
+        password = make_password(None)
+        names = {record['username'] for number, record in rows}
+        existing = User.objects.filter(username__in=names).count()
+        User.objects.bulk_create([
+            User(
+                username=record['username'], password=password,
+                first_name=_text(record['first_name']),
+                last_name=_text(record['last_name']),
+                email=_text(record['email']),
+            )
+            for number, record in rows
+        ], ignore_conflicts=True)
+        return User.objects.filter(username__in=names).count() - existing
+
+    def load_post(self, rows):
+        authors = self.users(rows, 'author')
+        slugs = {record['group'] for number, record in rows if record['group']}
+        groups = dict(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'id')
+        )
+        posts = []
+        for number, record in rows:
+            slug = record['group']
+            if slug and slug not in groups:
+                raise TransferError(number, f'нет группы {slug!r}')
+            image = _text(record['image'])
+            if image and not default_storage.exists(image):
+                self.missing_images += 1
+            posts.append(Post(
+                id=_int(number, record['id'], 'id'),
+                author_id=authors[record['author']],
+                group_id=groups[slug] if slug else None,
+                text=_text(record['text']), image=image,
+                created=_created(number, record['created']),
+            ))
+        return self.insert(
+            'пост', rows, posts, ('author_id', 'group_id', 'text', 'created')
+        )
+
+    def load_comment(self, rows):
+        authors = self.users(rows, 'author')
+        post_ids = {
+            _int(number, record['post'], 'post') for number, record in rows
+        }
+        found = set(Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('pk', flat=True))
+        comments = []
+        for number, record in rows:
+            post_id = int(record['post'])
+            if post_id not in found:
+                raise TransferError(number, f'нет поста {post_id}')
+            comments.append(Comment(
+                id=_int(number, record['id'], 'id'), post_id=post_id,
+                author_id=authors[record['author']],
+                text=_text(record['text']),
+                created=_created(number, record['created']),
+            ))
+        return self.insert(
+            'комментарий', rows, comments,
+            ('post_id', 'author_id', 'text', 'created')
+        )
+
+    def load_follow(self, rows):
+        users = self.users(rows, 'user', 'author')
+        pairs = {
+            (users[record['user']], users[record['author']])
+            for number, record in rows
+        }
+        existing = set(Follow.objects.filter(
+            user_id__in={user_id for user_id, author_id in pairs},
+            author_id__in={author_id for user_id, author_id in pairs},
+        ).values_list('user_id', 'author_id'))
+        new = pairs - existing
+        Follow.objects.bulk_create([
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in new
+        ], ignore_conflicts=True)
+        return len(new)
+
+    def reset_sequences(self):
+        """Сдвинуть последовательности ключей после явных id (PostgreSQL)."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def rebuild_derived():
+    """Счётчики, ленты подписок и поисковый индекс после bulk_create.
+
+    bulk_create не вызывает сигналов, поэтому всё, что они обычно
+    поддерживают, пересобирается по загруженным данным.
+    """
+    with transaction.atomic():
+        counters.recount()
+        timeline.rebuild()
+        search.rebuild()
+    invalidate_pages()
+    follow.invalidate_all()
@@ -0,0 +1,132 @@
+import os
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import (SkipFile, StopFutureHandlers,
+                                             TemporaryFileUploadHandler)
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+# Сколько первых байт файла держим в памяти, чтобы прочитать заголовок.
+HEADER_LIMIT = 64 * 1024
+
+
+def upload_errors(request):
+    """Ошибки, с которыми обработчик загрузки отклонил файлы запроса."""
+    return getattr(request, 'upload_errors', {})
+
+
+def bounded_image_uploads(view):
+    """Принимать файлы view через BoundedImageUploadHandler.
+
+    Обработчики загрузки меняются до чтения request.POST, а его читает
+    CsrfViewMiddleware, поэтому CSRF проверяется уже внутри: снаружи
+    csrf_exempt, вокруг view — csrf_protect.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, BoundedImageUploadHandler(request))
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Потоковая загрузка картинок с ранним отказом.
+
+    Файл пишется на диск кусками, в памяти держится только заголовок.
+    Файл пропускается, и на диск его остаток не пишется, если заявленный
+    или фактический размер больше POST_IMAGE_MAX_SIZE, файл не похож на
+    картинку или в ней больше POST_IMAGE_MAX_PIXELS точек; форма
+    показывает ошибку из upload_errors.
+    """
+    request_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        self.request_too_large = (
+            content_length > settings.POST_IMAGE_MAX_SIZE + HEADER_LIMIT
+        )
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.header = b''
+        self.checked = False
+        if self.request_too_large:
+            self.reject('Файл слишком большой.')
+        # Остальные обработчики из FILE_UPLOAD_HANDLERS этот файл не видят.
+        raise StopFutureHandlers
+
+    def reject(self, message):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+        raise SkipFile
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.POST_IMAGE_MAX_SIZE:
+            self.reject('Файл слишком большой.')
+        if not self.checked:
+            self.header += raw_data[:HEADER_LIMIT - len(self.header)]
+            self.check_header(final=len(self.header) >= HEADER_LIMIT)
+        return super().receive_data_chunk(raw_data, start)
+
+    def check_header(self, final=False):
+        """Прочитать размеры из заголовка, не декодируя картинку."""
+        try:
+            width, height = Image.open(BytesIO(self.header)).size
+        except Exception:
+            if final:
+                self.reject('Загрузите картинку.')
+            return
+        self.checked = True
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            self.reject('Слишком большое разрешение картинки.')
+
+    def file_complete(self, file_size):
+        if not self.checked:
+            try:
+                self.check_header(final=True)
+            except SkipFile:
+                # Файл уже прочитан целиком и пропустить его нельзя:
+                # PostForm отбросит его и покажет ошибку из upload_errors.
+                pass
+        return super().file_complete(file_size)
+
+
+def canonical_image(uploaded):
+    """Уменьшить картинку больше POST_IMAGE_MAX_SIDE и перекодировать.
+
+    Картинки в пределах лимита возвращаются как есть. JPEG декодируется
+    сразу в уменьшенном масштабе (draft), поэтому память на декодирование
+    ограничена размером результата, а не исходника.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    uploaded.seek(0)
+    try:
+        image = Image.open(uploaded)
+        if max(image.size) <= max_side:
+            return uploaded
+        image.draft('RGB', (max_side, max_side))
+        image.thumbnail((max_side, max_side))
+    except Exception as exc:
+        raise ValidationError('Загрузите картинку.') from exc
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image_format, extension, content_type = 'PNG', '.png', 'image/png'
+    else:
+        image = image.convert('RGB')
+        image_format, extension, content_type = 'JPEG', '.jpg', 'image/jpeg'
+    output = BytesIO()
+    image.save(output, image_format, quality=85, optimize=True)
+    size = output.tell()
+    output.seek(0)
+    return InMemoryUploadedFile(
+        output, getattr(uploaded, 'field_name', None),
+        os.path.splitext(uploaded.name)[0] + extension,
+        content_type, size, None
+    )
@@ -1,15 +1,21 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='posts_index'),
     path('group/<slug:slug>/', views.group_posts, name='posts_group'),
+    path('search/', views.search, name='search'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -26,4 +32,34 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('api/v1/posts/', api.posts, name='api_posts'),
+    path(
+        'api/v1/groups/<slug:slug>/posts/',
+        api.group_posts,
+        name='api_group_posts'
+    ),
+    path('api/v1/follow/', api.follow, name='api_follow'),
 ]
+
+# Бюджеты SQL-запросов на один вызов страницы: имя URL -> наибольшее
+# число запросов, включая сессию и пользователя. Проверяются в тестах
+# клиентом core.querycount.QueryBudgetClient; там же одинаковый запрос
+# не может повториться больше QUERY_REPEAT_LIMIT раз (N+1).
+QUERY_REPEAT_LIMIT = 2
+QUERY_BUDGETS = {
+    'posts_index': 5,
+    'posts_group': 5,
+    'search': 4,
+    'profile': 7,
+    'post_detail': 5,
+    'post_create': 11,
+    'post_edit': 11,
+    'add_comment': 9,
+    'comments': 4,
+    'follow_index': 5,
+    'profile_follow': 10,
+    'profile_unfollow': 9,
+    'api_posts': 3,
+    'api_group_posts': 4,
+    'api_follow': 5,
+}
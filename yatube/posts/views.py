@@ -1,71 +1,147 @@
-from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-
-from .models import Post, Group, User, Follow
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from core.cache.pages import cache_page_shell
+from core.db.router import read_from_replica
+from core.rendering import engine_for
+from core.paginator import CursorPaginator, approximate_count
+from .models import Post, Group, User
+from .conditional import (
+    conditional_page, group_state, index_state, post_detail_state,
+    profile_state
+)
+from .counters import stats_for
+from .follow import follow, is_following, unfollow
 from .forms import PostForm, CommentForm
+from .search import search_posts
+from .timeline import TimelinePaginator
+from .uploads import bounded_image_uploads, upload_errors
 
 NUMBER_OF_POSTS = 5  # количество отображаемых постов на странице
+NUMBER_OF_COMMENTS = 20  # комментариев на странице поста и в подгрузке
 
 
-def paginat(request, queryset):
-    pagin = Paginator(queryset, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    return pagin.get_page(page_number)
+def paginat(request, queryset, total=None):
+    pagin = CursorPaginator(queryset, NUMBER_OF_POSTS, total=total)
+    return pagin.get_page(request.GET.get('cursor'))
 
 
+@read_from_replica
+@conditional_page(index_state)
+@cache_page_shell
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     context = {
-        'page_obj': paginat(request, post_list),
+        'page_obj': paginat(
+            request, post_list, total=lambda: approximate_count(Post)
+        ),
     }
-    return render(request, 'posts/index.html', context)
+    return render(request, 'posts/index.html', context,
+                  using=engine_for(request))
 
 
+@read_from_replica
+@conditional_page(group_state)
+@cache_page_shell
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_list = group.posts.all()
+    group_list = group.posts.for_feed()
     context = {
         'group': group,
-        'page_obj': paginat(request, group_list),
+        'page_obj': paginat(request, group_list, total=group.post_count),
+    }
+    return render(request, 'posts/group_list.html', context,
+                  using=engine_for(request))
+
+
+def search(request):
+    """Поиск по постам и комментариям с выдачей по релевантности.
+
+    Индекс отдаёт ограниченный список номеров лучших постов, поэтому
+    здесь обычный постраничный паджинатор поверх этого списка.
+    """
+    query = request.GET.get('q', '').strip()
+    hits = search_posts(query) if query else []
+    page_obj = Paginator(hits, NUMBER_OF_POSTS).get_page(
+        request.GET.get('page')
+    )
+    posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return render(request, 'posts/search.html', context)
 
 
+@read_from_replica
+@conditional_page(profile_state)
+@cache_page_shell
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    num_of_posts = posts.count()
-    user = request.user
-    following = user.is_authenticated and (
-        user.follower.filter(author_id=author.id)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
     )
+    posts = author.posts.for_feed()
+    num_of_posts = stats_for(author).post_count
     context = {
         'num_of_posts': num_of_posts,
         'author': author,
-        'page_obj': paginat(request, posts),
-        'following': following,
+        'page_obj': paginat(request, posts, total=num_of_posts),
+        'following': is_following(request.user, author.id),
     }
-    return render(request, 'posts/profile.html', context)
+    return render(request, 'posts/profile.html', context,
+                  using=engine_for(request))
 
 
+@read_from_replica
+@conditional_page(post_detail_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    num_of_posts = post.author.posts.count()
+    num_of_posts = stats_for(post.author).post_count
     context = {
         'post': post,
         'num_of_posts': num_of_posts,
         'form': form,
-        'comments': comments,
+        'comments': comment_page(request, post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_page(request, post):
+    """Страница комментариев поста по курсору (created, id)."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'), NUMBER_OF_COMMENTS,
+        total=post.comment_count, ordering=('created', 'id')
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+@read_from_replica
+def comments(request, post_id):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+    post = get_object_or_404(
+        Post.objects.only('id', 'comment_count'), pk=post_id
+    )
+    context = {
+        'post': post,
+        'comments': comment_page(request, post),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
+@bounded_image_uploads
+@transaction.atomic
 def post_create(request):
-    form = PostForm(request.POST or None, request.FILES or None)
+    form = PostForm(request.POST or None, request.FILES or None,
+                    upload_errors=upload_errors(request))
     if form.is_valid():
         form = form.save(commit=False)
         form.author = request.user
@@ -79,12 +155,14 @@ def post_create(request):
 
 
 @login_required
+@bounded_image_uploads
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(request.POST or None, files=request.FILES or None,
-                    instance=post)
+                    instance=post, upload_errors=upload_errors(request))
     if form.is_valid():
         form.save()
         return redirect('posts:post_detail', post_id=post_id)
@@ -97,6 +175,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -110,30 +189,26 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
     context = {
-        'page_obj': paginat(request, posts),
+        'page_obj': TimelinePaginator(
+            request.user, NUMBER_OF_POSTS
+        ).get_page(request.GET.get('cursor')),
     }
-    return render(request, 'posts/follow.html', context)
+    return render(request, 'posts/follow.html', context,
+                  using=engine_for(request))
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    user = request.user
-    if user == author or user.follower.filter(author=author):
-        return redirect('posts:profile', username=username)
-    Follow.objects.get_or_create(
-        user_id=user.id,
-        author_id=author.id,
-    )
+    follow(request.user, author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follow_author = Follow.objects.get(author_id=author.id)
-    follow_author.delete()
-
+    unfollow(request.user, author)
     return redirect('posts:profile', username=username)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, pass_context
+from markupsafe import Markup
+
+from core.cache.pages import hole_markers
+from core.templatetags.user_filters import addclass
+from posts.thumbnails import thumbnail_url
+
+
+def url(name, *args, **kwargs):
+    """{{ url('posts:profile', username) }} — аналог тега {% url %}."""
+    return reverse(name, args=args or None, kwargs=kwargs or None)
+
+
+def date_filter(value, arg=None):
+    # Как у фильтра Django: дата сначала переводится в текущий пояс.
+    return date(template_localtime(value), arg)
+
+
+@pass_context
+def hole(context, template_name, **params):
+    """{{ hole('includes/header.html') }} — аналог тега {% hole %}."""
+    content = context.environment.get_template(template_name).render(
+        context.get_all()
+    )
+    if getattr(context.get('request'), 'page_shell', False):
+        start, end = hole_markers(template_name, params)
+        content = f'{start}{content}{end}'
+    return Markup(content)
+
+
+def cache_fragment(timeout, fragment_name, *vary_on, caller):
+    """{% call cache_fragment(600, 'имя', ...) %} — аналог {% cache %}."""
+    key = make_template_fragment_key(fragment_name, vary_on)
+    content = cache.get(key)
+    if content is None:
+        content = str(caller())
+        cache.set(key, content, timeout)
+    return Markup(content)
+
+
+def environment(**options):
+    """Окружение Jinja2 для бэкенда django.template.backends.jinja2.
+
+    Глобальные функции и фильтры повторяют теги и фильтры шаблонов
+    Django, которыми пользуются ленты.
+    """
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        # {{ thumbnail(post, 'card') }} — аналог тега {% post_thumbnail %}.
+        'thumbnail': thumbnail_url,
+        'hole': hole,
+        'cache_fragment': cache_fragment,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date_filter,
+    })
+    return env
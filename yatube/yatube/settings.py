@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from core.cache.config import cache_settings
+from core.db.config import database_settings, replica_aliases
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -45,13 +48,16 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
-    'core',
+    'core.apps.CoreConfig',
     'about',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.middleware.MetricsMiddleware',
+    'core.db.middleware.ReplicaMiddleware',
+    'core.db.middleware.DeferredTransactionsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,12 +71,26 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Кеширующий загрузчик компилирует шаблон один раз на процесс. При DEBUG
+# он выключен, чтобы правки шаблонов были видны сразу; включить его и
+# при отладке можно переменной YATUBE_CACHED_TEMPLATES=1.
+CACHED_TEMPLATES = (
+    not DEBUG or os.environ.get('YATUBE_CACHED_TEMPLATES') == '1'
+)
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if CACHED_TEMPLATES:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -80,7 +100,27 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        # Порты лент на Jinja2 (jinja2/), см. VIEW_TEMPLATE_ENGINES.
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'yatube.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
 ]
+# Движок шаблонов для view по имени ('django' или 'jinja2'), см.
+# core.rendering.engine_for. YATUBE_JINJA_VIEWS — имена view через
+# запятую, которые рисуются через Jinja2, например posts:posts_index.
+VIEW_TEMPLATE_ENGINES = {
+    name.strip(): 'jinja2'
+    for name in os.environ.get('YATUBE_JINJA_VIEWS', '').split(',')
+    if name.strip()
+}
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -88,12 +128,21 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
-}
+# SQLite для продакшена (core.db.sqlite3): WAL и очередь записи. При DEBUG
+# выключен, чтобы команды manage.py не переводили db.sqlite3 в WAL;
+# включить можно переменной YATUBE_TUNED_SQLITE=1.
+TUNED_SQLITE = not DEBUG or os.environ.get('YATUBE_TUNED_SQLITE') == '1'
+DATABASES = database_settings(BASE_DIR, tuned=TUNED_SQLITE)
+DATABASE_ROUTERS = ['core.db.router.ReplicaRouter']
+# Алиасы реплик, с которых читают ленты (core.db.router).
+DATABASE_REPLICAS = replica_aliases(DATABASES)
+# Приложения, модели которых читаются с реплик (User — из auth). Сессии
+# и кеш в базе всегда идут на основную базу.
+REPLICA_APPS = ('posts', 'auth')
+# Сколько секунд после записи клиент читает только с основной базы.
+REPLICA_STICKY_SECONDS = 5
+# Как часто проверять постоянные соединения перед запросом.
+DB_HEALTH_CHECK_INTERVAL = 30
 
 
 # Password validation
@@ -136,6 +185,22 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Продакшен-режим статики и медиа (core/assets): collectstatic кладёт в
+# STATIC_ROOT файлы с хешем содержимого в имени и их сжатые копии, а
+# yatube/wsgi.py отдаёт статику и медиа сам, до view Django. При DEBUG
+# выключен; включить можно переменной YATUBE_ASSETS_PIPELINE=1.
+ASSETS_PIPELINE = (
+    not DEBUG or os.environ.get('YATUBE_ASSETS_PIPELINE') == '1'
+)
+if ASSETS_PIPELINE:
+    STATICFILES_STORAGE = 'core.assets.storage.CompressedManifestStorage'
+# max-age статики без хеша в имени и медиа; хешированные файлы
+# кешируются на год.
+STATIC_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 60 * 60 * 24
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:posts_index'
@@ -149,12 +214,36 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+# Картинки постов (post_create и post_edit) загружаются потоком на диск,
+# см. posts/uploads.py. В памяти запроса держится только заголовок файла,
+# а декодирование ограничено числом точек картинки.
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024  # байт
+POST_IMAGE_MAX_PIXELS = 24 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 1920  # большие картинки уменьшаются до этого размера
+
+# Бэкенд кеша выбирается переменной окружения YATUBE_CACHE_URL,
+# см. core/cache/config.py
+CACHES = cache_settings()
+
+# Сколько секунд хранится анонимная оболочка главной, групп и профилей,
+# см. core/cache/pages.py
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Потоки, которые строят превью загруженных картинок;
+# 0 — строить превью сразу после сохранения поста.
+THUMBNAIL_WORKERS = int(os.environ.get('YATUBE_THUMBNAIL_WORKERS', 2))
 
 INTERNAL_IPS = [
     '127.0.0.1',
-]
\ No newline at end of file
+]
+# Шаблоны debug_toolbar находит загрузчик app_directories из
+# TEMPLATE_LOADERS, APP_DIRS для этого не нужен.
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+
+# Метрики запросов (core/metrics): доля запросов с подробными замерами
+# SQL, шаблонов и кеша, размер окна для квантилей и доступ к /metrics:
+# по токену (Authorization: Bearer), а без него — адресам из списка.
+METRICS_SAMPLE_RATE = float(os.environ.get('YATUBE_METRICS_SAMPLE_RATE', 0.01))
+METRICS_BUFFER_SIZE = 1000
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = INTERNAL_IPS
\ No newline at end of file
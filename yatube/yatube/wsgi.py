@@ -9,8 +9,25 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны компилируются при старте: ошибка в шаблоне не даёт запустить
+# процесс, а кеш загрузчика заполнен до первого запроса.
+from core.rendering import warm_templates  # noqa: E402
+
+template_errors = warm_templates()
+if template_errors:
+    raise ImproperlyConfigured('\n'.join(template_errors))
+
+# Статика и медиа отдаются до Django, см. core/assets/handler.py.
+from django.conf import settings  # noqa: E402
+
+if settings.ASSETS_PIPELINE:
+    from core.assets.handler import AssetsHandler
+
+    application = AssetsHandler(application)